@@ -1,6 +1,6 @@
 {
     'name': 'Salida Acopio Manifiesto',
-    'version': '19.0.1.0.0',
+    'version': '19.0.1.1.0',
     'category': 'Inventory',
     'summary': 'Salida automática de residuos del inventario hacia disposición final con manifiestos de salida',
     'description': '''
@@ -22,12 +22,16 @@
     'data': [
         'security/ir.model.access.csv',
         'data/stock_data.xml',
+        'data/salida_acopio_job_data.xml',
         'reports/manifiesto_salida_report.xml',
         'wizard/salida_acopio_wizard_views.xml',
+        'wizard/salida_acopio_import_views.xml',
+        'wizard/salida_acopio_print_batch_views.xml',
         'views/salida_acopio_views.xml',
         'views/salida_acopio_print_views.xml',
         'views/stock_picking_views.xml',
         'views/salida_acopio_menus.xml',
+        'views/salida_acopio_analisis_views.xml',
     ],
     'demo': [],
     'application': True,
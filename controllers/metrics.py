@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+from odoo import http
+from odoo.http import request
+from odoo.tools import consteq
+
+from ..models.salida_acopio_metrics import metrics
+
+METRICS_TOKEN_PARAM = 'salida_acopio_manifiesto.metrics_token'
+
+
+class SalidaAcopioMetrics(http.Controller):
+
+    @http.route('/salida_acopio/metrics', type='http', auth='public', methods=['GET'], csrf=False)
+    def salida_acopio_metrics(self, token=None, **kwargs):
+        """Métricas de este worker en formato Prometheus.
+
+        Acceso para administradores con sesión o con el ``token`` configurado
+        en el parámetro ``salida_acopio_manifiesto.metrics_token``.
+        """
+        expected = request.env['ir.config_parameter'].sudo().get_param(METRICS_TOKEN_PARAM)
+        autorizado = (
+            (expected and token and consteq(expected, token))
+            or request.env.user.has_group('base.group_system')
+        )
+        if not autorizado:
+            return request.make_response('Forbidden', status=403)
+        return request.make_response(
+            metrics.render(),
+            headers=[('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')],
+        )
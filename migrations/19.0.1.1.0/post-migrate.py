@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+
+def migrate(cr, version):
+    """Crea las reservas de lote de las salidas existentes no canceladas.
+
+    Si un lote aparece en varias salidas, se reserva para la realizada o, en
+    su defecto, para la línea más antigua; el resto se detecta al confirmar.
+    """
+    if not version:
+        return
+    cr.execute("""
+        INSERT INTO salida_acopio_reserva
+               (linea_id, lot_id, salida_id, state, active,
+                create_uid, create_date, write_uid, write_date)
+        SELECT DISTINCT ON (l.lote_id)
+               l.id, l.lote_id, l.salida_id, s.state, TRUE,
+               1, now() AT TIME ZONE 'UTC', 1, now() AT TIME ZONE 'UTC'
+          FROM salida_acopio_linea l
+          JOIN salida_acopio s ON s.id = l.salida_id
+         WHERE l.lote_id IS NOT NULL
+           AND s.state != 'cancel'
+           AND NOT EXISTS (SELECT 1 FROM salida_acopio_reserva r WHERE r.linea_id = l.id)
+         ORDER BY l.lote_id, s.state = 'done' DESC, l.id
+        ON CONFLICT DO NOTHING
+    """)
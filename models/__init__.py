@@ -1,4 +1,16 @@
 # -*- coding: utf-8 -*-
 from . import salida_acopio
 from . import salida_acopio_print
-from . import stock_picking_inherit
\ No newline at end of file
+from . import manifiesto_salida_report
+from . import salida_acopio_job
+from . import salida_acopio_stat
+from . import salida_acopio_reserva
+from . import salida_acopio_indexes
+from . import salida_acopio_analisis
+from . import salida_acopio_benchmark
+from . import manifiesto_ambiental_inherit
+from . import stock_picking_inherit
+from . import stock_location_inherit
+from . import stock_lot_inherit
+from . import stock_quant_inherit
+from . import res_company
@@ -0,0 +1,93 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+import hashlib
+
+from .manifiesto_salida_report import MANIFIESTO_REPORT_FIELDS, RESIDUO_REPORT_FIELDS
+
+# Prefijo de los PDF de manifiesto de salida guardados como adjunto por el
+# reporte (ver ``attachment`` en action_report_manifiesto_salida).
+PDF_CACHE_PREFIX = 'MANIFIESTO_SALIDA_'
+
+
+def _pdf_firma(record, field_names):
+    """Valores que imprime la plantilla como texto estable para el hash.
+
+    De los relacionales se toma el nombre mostrado, que es lo que aparece en
+    el PDF: renombrar un lote o un embalaje cambia la firma.
+    """
+    partes = []
+    for name in field_names:
+        if name not in record._fields:
+            continue
+        value = record[name]
+        if isinstance(value, models.BaseModel):
+            value = value.mapped('display_name')
+        partes.append(f"{name}={value}")
+    return '|'.join(partes)
+
+
+def _company_firma(company):
+    """Encabezado y pie del ``external_layout``: logo, dirección y formato del
+    documento viven en la compañía y en su partner."""
+    return f"company={company.id}|{company.write_date}|{company.partner_id.write_date}"
+
+
+def _unlink_pdf_cache(env, manifiesto_ids):
+    """Elimina los PDF guardados de los manifiestos indicados."""
+    if not manifiesto_ids:
+        return
+    env['ir.attachment'].sudo().search([
+        ('res_model', '=', 'manifiesto.ambiental'),
+        ('res_id', 'in', list(manifiesto_ids)),
+        ('name', '=like', f'{PDF_CACHE_PREFIX}%'),
+    ]).unlink()
+
+
+class ManifiestoAmbiental(models.Model):
+    _inherit = 'manifiesto.ambiental'
+
+    # La acción "Manifiestos de Salida" filtra con ilike sobre este campo
+    generador_nombre = fields.Char(index='trigram')
+
+    pdf_cache_key = fields.Char(
+        string='Clave de PDF',
+        compute='_compute_pdf_cache_key',
+        help='Hash de los datos que se imprimen; forma parte del nombre del PDF guardado.',
+    )
+
+    def _compute_pdf_cache_key(self):
+        for record in self:
+            company = record.company_id or record.env.company
+            firma = [_company_firma(company), _pdf_firma(record, MANIFIESTO_REPORT_FIELDS)]
+            firma += [_pdf_firma(r, RESIDUO_REPORT_FIELDS) for r in record.residuo_ids.sorted('id')]
+            record.pdf_cache_key = hashlib.sha1('\n'.join(firma).encode()).hexdigest()[:16]
+
+    def write(self, vals):
+        res = super().write(vals)
+        # Chatter, adjunto principal y demás campos no impresos no invalidan
+        if any(name in MANIFIESTO_REPORT_FIELDS for name in vals):
+            _unlink_pdf_cache(self.env, self.ids)
+        return res
+
+
+class ManifiestoAmbientalResiduo(models.Model):
+    _name = 'manifiesto.ambiental.residuo'
+    _inherit = ['manifiesto.ambiental.residuo', 'salida.acopio.cretib.mixin']
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        _unlink_pdf_cache(self.env, records.manifiesto_id.ids)
+        return records
+
+    def write(self, vals):
+        manifiesto_ids = set(self.manifiesto_id.ids)
+        res = super().write(vals)
+        _unlink_pdf_cache(self.env, manifiesto_ids | set(self.manifiesto_id.ids))
+        return res
+
+    def unlink(self):
+        manifiesto_ids = self.manifiesto_id.ids
+        res = super().unlink()
+        _unlink_pdf_cache(self.env, manifiesto_ids)
+        return res
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+from odoo import models, api
+from odoo.tools import formatLang
+import time
+
+from .salida_acopio import CRETIB_FIELDS
+from .salida_acopio_metrics import metrics_for
+
+# Renglones mínimos de la tabla "5. Identificación de los residuos"
+MIN_FILAS_RESIDUOS = 18
+
+# Campos de manifiesto.ambiental que imprime la plantilla (``doc.<campo>``)
+MANIFIESTO_REPORT_FIELDS = [
+    'destinatario_calle', 'destinatario_codigo_postal', 'destinatario_colonia',
+    'destinatario_email', 'destinatario_estado', 'destinatario_fecha',
+    'destinatario_municipio', 'destinatario_nombre', 'destinatario_num_ext',
+    'destinatario_num_int', 'destinatario_responsable_nombre', 'destinatario_sello',
+    'destinatario_telefono', 'generador_calle', 'generador_codigo_postal',
+    'generador_colonia', 'generador_email', 'generador_estado', 'generador_fecha',
+    'generador_municipio', 'generador_nombre', 'generador_num_ext', 'generador_num_int',
+    'generador_responsable_nombre', 'generador_sello', 'generador_telefono',
+    'instrucciones_especiales', 'nombre_persona_recibe', 'numero_autorizacion_semarnat',
+    'numero_autorizacion_semarnat_destinatario', 'numero_manifiesto',
+    'numero_permiso_sct', 'numero_placa', 'numero_registro_ambiental',
+    'observaciones_destinatario', 'pagina', 'ruta_empresa', 'tipo_vehiculo',
+    'transportista_calle', 'transportista_codigo_postal', 'transportista_colonia',
+    'transportista_email', 'transportista_estado', 'transportista_fecha',
+    'transportista_municipio', 'transportista_nombre', 'transportista_num_ext',
+    'transportista_num_int', 'transportista_responsable_nombre', 'transportista_sello',
+    'transportista_telefono',
+]
+
+RESIDUO_REPORT_FIELDS = [
+    'lot_id', 'nombre_residuo', 'envase_cantidad', 'packaging_id', 'envase_tipo',
+    'envase_capacidad', 'cantidad', 'etiqueta_si', 'etiqueta_no',
+] + CRETIB_FIELDS
+
+REPORT_NAME = 'salida_acopio_manifiesto.manifiesto_salida_document'
+
+
+class ManifiestoSalidaReport(models.AbstractModel):
+    _name = 'report.salida_acopio_manifiesto.manifiesto_salida_document'
+    _description = 'Reporte de Manifiesto de Salida'
+
+    @api.model
+    def _get_report_values(self, docids, data=None):
+        """Entrega a la plantilla las filas de residuos ya resueltas.
+
+        Residuos, lotes y embalajes de todos los manifiestos se leen en
+        pocas consultas; cada fila es una tupla de textos y la lista de cada
+        manifiesto viene rellenada con ``None`` hasta ``MIN_FILAS_RESIDUOS``.
+        """
+        docs = self.env['manifiesto.ambiental'].browse(docids)
+        residuos = docs.residuo_ids
+        residuos.fetch(RESIDUO_REPORT_FIELDS + ['manifiesto_id'])
+        residuos.lot_id.fetch(['name'])
+        residuos.packaging_id.fetch(['name'])
+
+        Residuo = self.env['manifiesto.ambiental.residuo']
+        envase_tipos = dict(Residuo._fields['envase_tipo']._description_selection(self.env))
+        digits = Residuo._fields['cantidad'].get_digits(self.env)
+
+        filas_por_doc = {doc.id: [] for doc in docs}
+        for residuo in residuos:
+            filas_por_doc[residuo.manifiesto_id.id].append((
+                residuo.lot_id.name or '',
+                residuo.nombre_residuo or '',
+                *('X' if residuo[f] else '' for f in CRETIB_FIELDS),
+                residuo.envase_cantidad or '',
+                residuo.packaging_id.name or envase_tipos.get(residuo.envase_tipo, ''),
+                residuo.envase_capacidad or '',
+                formatLang(self.env, residuo.cantidad, digits=digits[1] if digits else 2),
+                'X' if residuo.etiqueta_si else '',
+                'X' if residuo.etiqueta_no else '',
+            ))
+        for filas in filas_por_doc.values():
+            filas.extend([None] * (MIN_FILAS_RESIDUOS - len(filas)))
+
+        return {
+            'doc_ids': docids,
+            'doc_model': 'manifiesto.ambiental',
+            'docs': docs,
+            'filas_por_doc': filas_por_doc,
+        }
+
+
+class IrActionsReport(models.Model):
+    _inherit = 'ir.actions.report'
+
+    def _render_qweb_pdf(self, report_ref, res_ids=None, data=None):
+        inicio = time.perf_counter()
+        result = super()._render_qweb_pdf(report_ref, res_ids=res_ids, data=data)
+        if self._get_report(report_ref).report_name == REPORT_NAME:
+            metrics_for(self.env).observe('salida_acopio_reporte_segundos', time.perf_counter() - inicio)
+        return result
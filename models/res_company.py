@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from odoo import models
+from odoo.tools import ormcache
+
+from .salida_acopio import _find_location_acopio
+
+
+class ResCompany(models.Model):
+    _inherit = 'res.company'
+
+    @ormcache('self.id')
+    def _get_salida_acopio_config_ids(self):
+        """Resuelve una sola vez por compañía la ubicación de acopio, el tipo
+        de operación de salida y la ubicación destino. La caché se invalida
+        desde ``stock.location`` y ``stock.picking.type``."""
+        env = self.sudo().env
+        location_acopio = _find_location_acopio(env, self.id)
+        picking_type = env['stock.picking.type'].search([
+            ('code', '=', 'outgoing'),
+            ('warehouse_id.company_id', '=', self.id),
+        ], limit=1)
+        location_customer = env.ref('stock.stock_location_customers', raise_if_not_found=False)
+        return (
+            location_acopio.id or False,
+            picking_type.id or False,
+            location_customer.id if location_customer else False,
+        )
+
+    def _get_salida_acopio_config(self):
+        self.ensure_one()
+        location_id, picking_type_id, location_dest_id = self._get_salida_acopio_config_ids()
+        return {
+            'location_acopio': self.env['stock.location'].browse(location_id),
+            'picking_type': self.env['stock.picking.type'].browse(picking_type_id),
+            'location_dest': self.env['stock.location'].browse(location_dest_id),
+        }
@@ -1,7 +1,14 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api
 from odoo.exceptions import UserError, ValidationError
+from odoo.tools import split_every
+from odoo.tools.sql import column_exists, create_column, table_exists
+from psycopg2.errors import UniqueViolation
+from contextlib import contextmanager
 import logging
+import time
+
+from .salida_acopio_metrics import metrics_for
 
 _logger = logging.getLogger(__name__)
 
@@ -18,6 +25,123 @@ def _find_location_acopio(env, company_id=None):
     return env['stock.location'].search(domain, limit=1)
 
 
+BATCH_CONFIRM_CHUNK_SIZE = 20
+
+LOT_CONFLICT_ESTADOS = {
+    'draft': 'reservado en borrador en',
+    'processing': 'en proceso de confirmación en',
+    'done': 'ya entregado en',
+}
+
+QUANT_SNAPSHOT_CACHE_KEY = 'salida_acopio_quant_snapshot'
+PHASE_STATS_CACHE_KEY = 'salida_acopio_phase_stats'
+
+
+def _get_acopio_quant_snapshot(env, location):
+    """Existencias positivas de la ubicación de acopio agrupadas por producto y lote.
+
+    Se obtienen con un solo read_group y se guardan en la caché del cursor, de
+    modo que todos los computes de un mismo renderizado comparten la consulta.
+    La caché se invalida al modificar ``stock.quant``.
+    """
+    cache = env.cr.cache.setdefault(QUANT_SNAPSHOT_CACHE_KEY, {})
+    key = (location.id, env.uid, env.su)
+    snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = {'by_product': {}, 'by_lot': {}, 'lots_by_product': {}}
+        groups = env['stock.quant']._read_group(
+            [('location_id', '=', location.id), ('quantity', '>', 0)],
+            ['product_id', 'lot_id'], ['quantity:sum'],
+        )
+        for product, lot, quantity in groups:
+            by_product = snapshot['by_product']
+            by_product[product.id] = by_product.get(product.id, 0.0) + quantity
+            if lot:
+                snapshot['by_lot'][(product.id, lot.id)] = quantity
+                snapshot['lots_by_product'].setdefault(product.id, []).append(lot.id)
+        cache[key] = snapshot
+    return snapshot
+
+
+def _invalidate_acopio_quant_snapshot(env):
+    env.cr.cache.pop(QUANT_SNAPSHOT_CACHE_KEY, None)
+
+
+CRETIB_FIELDS = [
+    'clasificacion_corrosivo', 'clasificacion_reactivo',
+    'clasificacion_explosivo', 'clasificacion_toxico',
+    'clasificacion_inflamable', 'clasificacion_biologico',
+]
+
+# Bit de cada clase en ``cretib_mask``: C=1, R=2, E=4, T=8, I=16, B=32
+CRETIB_BITS = {field: 1 << i for i, field in enumerate(CRETIB_FIELDS)}
+CRETIB_LETTERS = dict(zip(CRETIB_FIELDS, 'CRETIB'))
+
+
+def _cretib_encode(values):
+    """Máscara CRETIB de un registro o de un dict con los booleanos ``clasificacion_*``."""
+    if isinstance(values, dict):
+        return sum(bit for field, bit in CRETIB_BITS.items() if values.get(field))
+    return sum(bit for field, bit in CRETIB_BITS.items() if values[field])
+
+
+def _cretib_decode(mask):
+    """Booleanos ``clasificacion_*`` de una máscara CRETIB."""
+    return {field: bool((mask or 0) & bit) for field, bit in CRETIB_BITS.items()}
+
+
+def _cretib_letters(mask):
+    """Texto ``'C, T'`` de una máscara CRETIB."""
+    return ', '.join(CRETIB_LETTERS[field] for field, bit in CRETIB_BITS.items() if (mask or 0) & bit)
+
+
+def _cretib_domain(letras, todas=False, field='cretib_mask'):
+    """Dominio para registros con alguna (o ``todas``) de las clases en ``letras``.
+
+    Las máscaras posibles son solo 64, así que la condición se traduce a un
+    ``IN`` sobre la columna indexada en lugar de una operación bit a bit que
+    no podría usar el índice.
+    """
+    letras = (letras or '').upper()
+    bits = sum(bit for f, bit in CRETIB_BITS.items() if CRETIB_LETTERS[f] in letras)
+    if not bits:
+        return []
+    masks = [m for m in range(64) if ((m & bits) == bits if todas else m & bits)]
+    return [(field, 'in', masks)]
+
+
+def _init_cretib_mask_column(model):
+    """Crea y llena ``cretib_mask`` con un solo UPDATE en tablas existentes.
+
+    Evita que el ORM recalcule la máscara registro por registro al instalar
+    en tablas grandes (``stock_move``, residuos de manifiestos). Sin las
+    columnas CRETIB la máscara queda en NULL, que se lee como 0.
+    """
+    cr = model.env.cr
+    if not table_exists(cr, model._table) or column_exists(cr, model._table, 'cretib_mask'):
+        return
+    create_column(cr, model._table, 'cretib_mask', 'int4')
+    if all(column_exists(cr, model._table, f) for f in CRETIB_FIELDS):
+        expr = ' + '.join(f"(CASE WHEN {f} THEN {bit} ELSE 0 END)" for f, bit in CRETIB_BITS.items())
+        cr.execute(f"UPDATE {model._table} SET cretib_mask = {expr}")
+
+
+def _merge_loaded_vals(vals, loaded):
+    """Aplica sobre ``vals`` los datos precargados de producto o lote con las
+    reglas de los onchange: CRETIB solo se activa y el nombre del residuo no
+    se sobrescribe."""
+    for field, value in loaded.items():
+        if field in CRETIB_FIELDS:
+            if value:
+                vals[field] = True
+        elif field == 'nombre_residuo':
+            if not vals.get(field):
+                vals[field] = value
+        else:
+            vals[field] = value
+    return vals
+
+
 ENVASE_TIPO_SELECTION = [
     ('tambor', 'Tambor'),
     ('contenedor', 'Contenedor'),
@@ -37,6 +161,43 @@ RESIDUE_TYPE_SELECTION = [
 ]
 
 
+class SalidaAcopioCretibMixin(models.AbstractModel):
+    """Máscara CRETIB almacenada e indexada junto a los seis booleanos.
+
+    Escribir ``cretib_mask`` actualiza los booleanos (inverse), de modo que
+    copiar la clasificación entre modelos es un solo campo.
+    """
+    _name = 'salida.acopio.cretib.mixin'
+    _description = 'Máscara CRETIB'
+
+    clasificacion_corrosivo = fields.Boolean(string='Corrosivo (C)')
+    clasificacion_reactivo = fields.Boolean(string='Reactivo (R)')
+    clasificacion_explosivo = fields.Boolean(string='Explosivo (E)')
+    clasificacion_toxico = fields.Boolean(string='Tóxico (T)')
+    clasificacion_inflamable = fields.Boolean(string='Inflamable (I)')
+    clasificacion_biologico = fields.Boolean(string='Biológico (B)')
+
+    cretib_mask = fields.Integer(
+        string='Máscara CRETIB',
+        compute='_compute_cretib_mask', inverse='_inverse_cretib_mask',
+        store=True, index=True,
+        help='C=1, R=2, E=4, T=8, I=16, B=32',
+    )
+
+    def _auto_init(self):
+        _init_cretib_mask_column(self)
+        return super()._auto_init()
+
+    @api.depends(*CRETIB_FIELDS)
+    def _compute_cretib_mask(self):
+        for record in self:
+            record.cretib_mask = _cretib_encode(record)
+
+    def _inverse_cretib_mask(self):
+        for record in self:
+            record.update(_cretib_decode(record.cretib_mask))
+
+
 class SalidaAcopio(models.Model):
     _name = 'salida.acopio'
     _description = 'Registro de Salida de Acopio'
@@ -45,7 +206,8 @@ class SalidaAcopio(models.Model):
 
     numero_referencia = fields.Char(
         string='Número de Referencia',
-        required=True, copy=False, readonly=True, default='/'
+        required=True, copy=False, readonly=True, default='/',
+        index='trigram',
     )
 
     manifiesto_salida_id = fields.Many2one(
@@ -95,11 +257,13 @@ class SalidaAcopio(models.Model):
 
     numero_placa = fields.Char(
         string='Número de Placa',
-        help='Se rellena automáticamente desde el vehículo seleccionado.'
+        help='Se rellena automáticamente desde el vehículo seleccionado.',
+        index='trigram',
     )
 
     state = fields.Selection([
         ('draft', 'Borrador'),
+        ('processing', 'Procesando'),
         ('done', 'Realizada'),
         ('cancel', 'Cancelada'),
     ], string='Estado', default='draft', required=True)
@@ -132,21 +296,53 @@ class SalidaAcopio(models.Model):
         default=lambda self: self.env.company
     )
 
+    job_ids = fields.One2many(
+        'salida.acopio.job', 'salida_id',
+        string='Confirmaciones en Cola', readonly=True,
+    )
+
+    cretib_clases = fields.Char(
+        string='Clases CRETIB',
+        compute='_compute_cretib_clases', search='_search_cretib_clases',
+        help='Busque con letras CRETIB, p. ej. "TI" para salidas con residuos tóxicos o inflamables.',
+    )
+
+    stat_ids = fields.One2many(
+        'salida.acopio.stat', 'salida_id',
+        string='Tiempos de Confirmación', readonly=True,
+    )
+
+    job_id = fields.Many2one(
+        'salida.acopio.job', string='Última Confirmación en Cola',
+        compute='_compute_job_id',
+    )
+    job_state = fields.Selection(related='job_id.state', string='Estado de la Cola')
+    job_progreso = fields.Integer(related='job_id.progreso', string='Progreso (%)')
+    job_fase = fields.Char(related='job_id.fase', string='Fase Actual')
+    job_error = fields.Text(related='job_id.error', string='Error de Confirmación')
+
+    lotes_sync_errores = fields.Text(
+        string='Lotes sin Sincronizar', readonly=True, copy=False,
+        help='Lotes a los que no se pudo escribir CRETIB o plan de manejo al confirmar.',
+    )
+
     @api.model_create_multi
     def create(self, vals_list):
-        for vals in vals_list:
-            if vals.get('numero_referencia', '/') == '/':
-                if vals.get('fecha_salida'):
-                    if isinstance(vals['fecha_salida'], str):
-                        fecha_utc = fields.Datetime.from_string(vals['fecha_salida'])
-                    else:
-                        fecha_utc = vals['fecha_salida']
-                    fecha_local = fields.Datetime.context_timestamp(self, fecha_utc)
+        sin_numero = [vals for vals in vals_list if vals.get('numero_referencia', '/') == '/']
+        fechas = []
+        for vals in sin_numero:
+            if vals.get('fecha_salida'):
+                if isinstance(vals['fecha_salida'], str):
+                    fecha_utc = fields.Datetime.from_string(vals['fecha_salida'])
                 else:
-                    fecha_local = fields.Datetime.context_timestamp(self, fields.Datetime.now())
-                vals['numero_referencia'] = self.env['ir.sequence'].with_context(
-                    ir_sequence_date=fecha_local.date()
-                ).next_by_code('salida.acopio') or '/'
+                    fecha_utc = vals['fecha_salida']
+                fecha_local = fields.Datetime.context_timestamp(self, fecha_utc)
+            else:
+                fecha_local = fields.Datetime.context_timestamp(self, fields.Datetime.now())
+            fechas.append(fecha_local.date())
+        for vals, numero in zip(sin_numero, self._reservar_numeros_referencia(fechas)):
+            vals['numero_referencia'] = numero
+        for vals in vals_list:
             # Auto-llenar placa desde vehículo si no viene explícita
             if vals.get('vehicle_id') and not vals.get('numero_placa'):
                 vehicle = self.env['fleet.vehicle'].browse(vals['vehicle_id'])
@@ -154,6 +350,50 @@ class SalidaAcopio(models.Model):
                     vals['numero_placa'] = vehicle.license_plate or False
         return super().create(vals_list)
 
+    @api.model
+    def _reservar_numeros_referencia(self, fechas):
+        """Números ``SAI-DDMMYYYY-N`` para una lista de fechas locales, en orden.
+
+        Por cada fecha distinta se resuelve el rango de la secuencia una vez y
+        se reserva el bloque completo con un solo ``nextval`` sobre
+        ``generate_series``. La secuencia de PostgreSQL no bloquea filas, así
+        que workers en paralelo no se esperan entre sí.
+        """
+        if not fechas:
+            return []
+        Sequence = self.env['ir.sequence']
+        seq = Sequence.sudo().search([
+            ('code', '=', 'salida.acopio'),
+            ('company_id', 'in', [self.env.company.id, False]),
+        ], order='company_id', limit=1)
+        if not seq or seq.implementation != 'standard':
+            # "Sin huecos" bloquea la fila de la secuencia: se conserva el camino estándar
+            return [
+                Sequence.with_context(ir_sequence_date=fecha).next_by_code('salida.acopio') or '/'
+                for fecha in fechas
+            ]
+
+        indices_por_fecha = {}
+        for i, fecha in enumerate(fechas):
+            indices_por_fecha.setdefault(fecha, []).append(i)
+        numeros = [None] * len(fechas)
+        for fecha, indices in indices_por_fecha.items():
+            seq_fecha = seq.with_context(ir_sequence_date=fecha)
+            if seq.use_date_range:
+                date_range = seq_fecha._get_current_sequence(sequence_date=fecha)
+                seq_fecha = seq_fecha.with_context(ir_sequence_date_range=date_range.date_from)
+                pg_sequence = f"ir_sequence_{seq.id:03d}_{date_range.id:03d}"
+            else:
+                pg_sequence = f"ir_sequence_{seq.id:03d}"
+            self.env.cr.execute(
+                "SELECT nextval(%s) FROM generate_series(1, %s)",
+                (pg_sequence, len(indices)),
+            )
+            bloque = sorted(row[0] for row in self.env.cr.fetchall())
+            for i, numero in zip(indices, bloque):
+                numeros[i] = seq_fecha.get_next_char(numero)
+        return numeros
+
     def write(self, vals):
         # Auto-llenar placa cuando se cambia el vehículo
         if 'vehicle_id' in vals and vals.get('vehicle_id') and 'numero_placa' not in vals:
@@ -168,14 +408,36 @@ class SalidaAcopio(models.Model):
             record.total_residuos = len(record.linea_ids)
             record.cantidad_total = sum(record.linea_ids.mapped('cantidad'))
 
-    def name_get(self):
-        result = []
+    @api.depends('linea_ids.cretib_mask')
+    def _compute_cretib_clases(self):
+        for record in self:
+            mask = 0
+            for m in record.linea_ids.mapped('cretib_mask'):
+                mask |= m
+            record.cretib_clases = _cretib_letters(mask)
+
+    def _search_cretib_clases(self, operator, value):
+        if operator not in ('ilike', '=') or not isinstance(value, str):
+            return NotImplemented
+        domain = _cretib_domain(value)
+        if not domain:
+            return [('id', '=', False)]
+        return [('linea_ids', 'any', domain)]
+
+    @api.depends('job_ids')
+    def _compute_job_id(self):
+        for record in self:
+            record.job_id = record.job_ids[:1]
+
+    @api.depends('numero_referencia', 'manifiesto_salida_id.numero_manifiesto')
+    def _compute_display_name(self):
+        # Números de manifiesto de todo el recordset en una sola lectura
+        self.manifiesto_salida_id.fetch(['numero_manifiesto'])
         for record in self:
             name = f"{record.numero_referencia}"
             if record.manifiesto_salida_id:
                 name += f" - Manifiesto: {record.manifiesto_salida_id.numero_manifiesto}"
-            result.append((record.id, name))
-        return result
+            record.display_name = name
 
     @api.onchange('vehicle_id')
     def _onchange_vehicle_id(self):
@@ -187,9 +449,151 @@ class SalidaAcopio(models.Model):
                 rec.numero_placa = False
 
     def action_confirmar_salida(self):
+        self.ensure_one()
+        self._iniciar_medicion()
+        with self._medir_fase('Validación'):
+            self._check_confirmable()
+        try:
+            self._confirmar_salida()
+            return {
+                'type': 'ir.actions.client',
+                'tag': 'display_notification',
+                'params': {
+                    'title': 'Salida Realizada',
+                    'message': f'La salida {self.numero_referencia} se realizó. Manifiesto: {self.manifiesto_salida_id.numero_manifiesto}'
+                               + (f'\n\n⚠️ Lotes sin sincronizar:\n{self.lotes_sync_errores}' if self.lotes_sync_errores else ''),
+                    'type': 'warning' if self.lotes_sync_errores else 'success',
+                    'sticky': False,
+                }
+            }
+        except Exception as e:
+            _logger.error(f"Error al confirmar salida {self.numero_referencia}: {str(e)}")
+            raise UserError(f"Error al realizar la salida: {str(e)}")
+
+    def action_confirmar_salidas_lote(self):
+        """Confirma varias salidas en borrador y reporta el resultado de cada una.
+
+        Las salidas se procesan por bloques que comparten la precarga de líneas,
+        la configuración de acopio y el partner SAI; cada salida corre en su
+        propio savepoint para que un error no revierta las demás.
+
+        Con más de ``BATCH_CONFIRM_CHUNK_SIZE`` salidas la confirmación pasa a
+        la cola ``salida.acopio.job``, que confirma y hace commit de cada
+        salida por separado, en lugar de retener una sola transacción HTTP.
+        """
+        borradores = self.filtered(lambda s: s.state == 'draft')
+        omitidas = self - borradores
+        if len(borradores) > BATCH_CONFIRM_CHUNK_SIZE:
+            return self._encolar_salidas_lote(borradores, omitidas)
+        confirmadas = self.browse()
+        errores = []
+        sai_partner = borradores[:1]._get_or_create_sai_partner() if borradores else False
+        _invalidate_acopio_quant_snapshot(self.env)
+        for chunk in split_every(BATCH_CONFIRM_CHUNK_SIZE, borradores.ids, self.browse):
+            chunk.linea_ids.mapped('lote_id')
+            for salida in chunk:
+                try:
+                    with self.env.cr.savepoint():
+                        salida._iniciar_medicion()
+                        with salida._medir_fase('Validación'):
+                            salida._check_confirmable(refrescar_stock=False)
+                        salida._confirmar_salida(sai_partner=sai_partner)
+                    confirmadas |= salida
+                except Exception as e:
+                    _invalidate_acopio_quant_snapshot(self.env)
+                    _logger.error(f"Error al confirmar salida {salida.numero_referencia}: {str(e)}")
+                    errores.append((salida, str(e)))
+
+        detalles = [
+            f"✅ {s.numero_referencia}: Manifiesto {s.manifiesto_salida_id.numero_manifiesto}"
+            + (" (⚠️ lotes sin sincronizar)" if s.lotes_sync_errores else "")
+            for s in confirmadas
+        ]
+        detalles += [f"❌ {s.numero_referencia}: {error}" for s, error in errores]
+        detalles += [f"⏭️ {s.numero_referencia}: no está en borrador" for s in omitidas]
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': f'Salidas confirmadas: {len(confirmadas)} de {len(self)}',
+                'message': "\n".join(detalles),
+                'type': 'warning' if errores or omitidas else 'success',
+                'sticky': bool(errores),
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
+            }
+        }
+
+    def _encolar_salidas_lote(self, borradores, omitidas):
+        """Valida cada salida en borrador y encola las válidas en un solo paso."""
+        errores = []
+        validas = self.browse()
+        _invalidate_acopio_quant_snapshot(self.env)
+        for salida in borradores:
+            try:
+                salida._check_confirmable(refrescar_stock=False)
+                validas |= salida
+            except Exception as e:
+                errores.append((salida, str(e)))
+        validas._crear_jobs_confirmacion()
+
+        detalles = [f"⏳ {s.numero_referencia}: en cola" for s in validas]
+        detalles += [f"❌ {s.numero_referencia}: {error}" for s, error in errores]
+        detalles += [f"⏭️ {s.numero_referencia}: no está en borrador" for s in omitidas]
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': f'Salidas en cola: {len(validas)} de {len(self)}',
+                'message': "\n".join(detalles),
+                'type': 'warning' if errores or omitidas else 'info',
+                'sticky': bool(errores),
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
+            }
+        }
+
+    def _crear_jobs_confirmacion(self):
+        """Pasa las salidas a procesando y crea un job de confirmación por cada una."""
+        if not self:
+            return
+        self.state = 'processing'
+        self.env['salida.acopio.job'].create([{'salida_id': salida.id} for salida in self])
+        self.env.ref('salida_acopio_manifiesto.ir_cron_salida_acopio_jobs')._trigger()
+
+    def action_encolar_confirmacion(self):
+        """Valida la salida y deja la confirmación al worker en segundo plano."""
+        self.ensure_one()
+        self._check_confirmable()
+        self._crear_jobs_confirmacion()
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Salida en Proceso',
+                'message': f'La salida {self.numero_referencia} se confirmará en segundo plano.',
+                'type': 'info',
+                'sticky': False,
+                'next': {'type': 'ir.actions.client', 'tag': 'soft_reload'},
+            }
+        }
+
+    def _check_confirmable(self, refrescar_stock=True):
         self.ensure_one()
         if self.state != 'draft':
             raise UserError("Solo se pueden confirmar salidas en estado borrador.")
+        self._check_datos_confirmacion(refrescar_stock=refrescar_stock)
+
+    def _check_datos_confirmacion(self, refrescar_stock=True):
+        """Valida líneas, lotes y existencias sin depender del estado de la salida.
+
+        La cola la vuelve a ejecutar justo antes de confirmar, porque entre
+        el encolado y el worker el stock o los lotes pueden haber cambiado.
+        Las existencias se leen del acopio de la compañía de la salida en ese
+        momento, no del valor almacenado en la línea. Los lotes de salidas
+        invalidan el snapshot una vez y pasan ``refrescar_stock=False``: así
+        se lee un snapshot por compañía, que ``stock.quant`` vuelve a
+        invalidar cuando una confirmación mueve existencias.
+        """
+        self.ensure_one()
         if not self.linea_ids:
             raise UserError("No hay líneas de salida para procesar.")
         if not self.transportista_id:
@@ -200,39 +604,97 @@ class SalidaAcopio(models.Model):
         self._validate_no_duplicates()
         self._validate_lotes_no_usados_previamente()
 
+        if refrescar_stock:
+            _invalidate_acopio_quant_snapshot(self.env)
+        snapshot = _get_acopio_quant_snapshot(self.env, self._get_location_acopio())
         for linea in self.linea_ids:
             if linea.cantidad <= 0:
                 raise UserError(
                     f"La cantidad del producto {linea.producto_id.name} debe ser mayor a cero."
                 )
-            if linea.cantidad > linea.stock_disponible:
+            if linea.lote_id:
+                disponible = snapshot['by_lot'].get((linea.producto_id.id, linea.lote_id.id), 0.0)
+            else:
+                disponible = snapshot['by_product'].get(linea.producto_id.id, 0.0)
+            if linea.cantidad > disponible:
                 raise UserError(
                     f"No hay suficiente stock para el producto {linea.producto_id.name}. "
-                    f"Solicitado: {linea.cantidad} kg, Disponible: {linea.stock_disponible} kg"
+                    f"Solicitado: {linea.cantidad} kg, Disponible: {disponible} kg"
                 )
-        try:
+
+    def _confirmar_salida(self, sai_partner=None, progress=None):
+        """Sincroniza lotes, genera manifiesto y picking y marca la salida como realizada.
+
+        ``progress`` es un callable opcional ``progress(fase, porcentaje)`` que
+        usa la cola de confirmaciones para publicar el avance.
+        """
+        self.ensure_one()
+        inicio = time.perf_counter()
+        progress = progress or (lambda fase, porcentaje: None)
+        progress('Sincronizando lotes', 10)
+        with self._medir_fase('Sincronización de lotes'):
             self._sync_lot_data()
-            manifiesto = self._create_manifiesto_salida()
-            picking = self._create_stock_picking()
-            self.write({
-                'state': 'done',
-                'picking_id': picking.id,
-                'manifiesto_salida_id': manifiesto.id,
-            })
-            _logger.info(f"Salida de acopio {self.numero_referencia} confirmada exitosamente")
-            return {
-                'type': 'ir.actions.client',
-                'tag': 'display_notification',
-                'params': {
-                    'title': 'Salida Realizada',
-                    'message': f'La salida {self.numero_referencia} se realizó. Manifiesto: {manifiesto.numero_manifiesto}',
-                    'type': 'success',
-                    'sticky': False,
-                }
-            }
-        except Exception as e:
-            _logger.error(f"Error al confirmar salida {self.numero_referencia}: {str(e)}")
-            raise UserError(f"Error al realizar la salida: {str(e)}")
+        progress('Generando manifiesto', 30)
+        with self._medir_fase('Manifiesto'):
+            manifiesto = self._create_manifiesto_salida(sai_partner=sai_partner)
+        progress('Generando transferencia', 60)
+        picking = self._create_stock_picking()
+        progress('Finalizando', 95)
+        self.write({
+            'state': 'done',
+            'picking_id': picking.id,
+            'manifiesto_salida_id': manifiesto.id,
+        })
+        self._guardar_medicion()
+        metrics = metrics_for(self.env)
+        metrics.inc('salida_acopio_confirmaciones_total')
+        metrics.inc('salida_acopio_kg_total', sum(self.linea_ids.mapped('cantidad')))
+        metrics.observe('salida_acopio_lineas_por_salida', len(self.linea_ids))
+        metrics.observe('salida_acopio_confirmacion_segundos', time.perf_counter() - inicio)
+        _logger.info(f"Salida de acopio {self.numero_referencia} confirmada exitosamente")
+        return manifiesto
+
+    # -------------------------------------------------------------------------
+    # Medición de fases
+    # -------------------------------------------------------------------------
+
+    def _iniciar_medicion(self):
+        """Descarta mediciones previas de esta salida en el cursor actual."""
+        self.env.cr.cache.setdefault(PHASE_STATS_CACHE_KEY, {})[self.id] = []
+
+    @contextmanager
+    def _medir_fase(self, fase):
+        """Mide duración y consultas SQL de una fase de la confirmación.
+
+        Las mediciones se acumulan en el caché del cursor y se guardan como
+        ``salida.acopio.stat`` al terminar la confirmación.
+        """
+        cr = self.env.cr
+        consultas = cr.sql_log_count
+        inicio = time.perf_counter()
+        try:
+            yield
+            self.env.flush_all()
+        except Exception:
+            metrics = metrics_for(self.env)
+            metrics.inc('salida_acopio_fase_errores_total', fase=fase)
+            if fase == 'Validación':
+                metrics.inc('salida_acopio_validaciones_fallidas_total')
+            raise
+        duracion = (time.perf_counter() - inicio) * 1000
+        consultas = cr.sql_log_count - consultas
+        cr.cache.setdefault(PHASE_STATS_CACHE_KEY, {}).setdefault(self.id, []).append((fase, duracion, consultas))
+        _logger.info(f"[ACOPIO] {self.numero_referencia} - {fase}: {duracion:.1f} ms, {consultas} consultas")
+
+    def _guardar_medicion(self):
+        mediciones = self.env.cr.cache.get(PHASE_STATS_CACHE_KEY, {}).pop(self.id, [])
+        self.env['salida.acopio.stat'].sudo().create([{
+            'salida_id': self.id,
+            'secuencia': secuencia,
+            'fase': fase,
+            'duracion': duracion,
+            'consultas': consultas,
+        } for secuencia, (fase, duracion, consultas) in enumerate(mediciones, start=1)])
 
     def _validate_no_duplicates(self):
         self.ensure_one()
@@ -253,61 +715,58 @@ class SalidaAcopio(models.Model):
             seen[key] = True
 
     def _validate_lotes_no_usados_previamente(self):
-        self.ensure_one()
-        for linea in self.linea_ids:
-            if not linea.lote_id:
-                continue
-            otras_done = self.env['salida.acopio.linea'].search([
-                ('lote_id', '=', linea.lote_id.id),
-                ('salida_id', '!=', self.id),
-                ('salida_id.state', '=', 'done'),
-            ], limit=1)
-            if otras_done:
-                raise UserError(
-                    f"⚠️ Lote ya entregado:\n\n"
-                    f"El lote '{linea.lote_id.name}' del producto '{linea.producto_id.name}' "
-                    f"ya fue dado de salida previamente en la salida "
-                    f"'{otras_done.salida_id.numero_referencia}'.\n\n"
-                    f"No es posible volver a darle salida."
-                )
-            otras_draft = self.env['salida.acopio.linea'].search([
-                ('lote_id', '=', linea.lote_id.id),
-                ('salida_id', '!=', self.id),
-                ('salida_id.state', '=', 'draft'),
-            ], limit=1)
-            if otras_draft:
-                raise UserError(
-                    f"⚠️ Lote reservado en otra salida:\n\n"
-                    f"El lote '{linea.lote_id.name}' del producto '{linea.producto_id.name}' "
-                    f"ya está incluido en la salida en borrador "
-                    f"'{otras_draft.salida_id.numero_referencia}'.\n\n"
-                    f"Cancele o procese primero esa salida, o elimine el lote de una de las dos."
-                )
+        lineas = self.linea_ids.filtered('lote_id')
+        salidas_by_lot = self.env['salida.acopio.linea']._get_salidas_by_lot(lineas.lote_id.ids)
+        conflictos = []
+        for linea in lineas:
+            otras = salidas_by_lot.get(linea.lote_id.id, linea.salida_id) - linea.salida_id
+            conflictos.extend((linea.lote_id, otra) for otra in otras)
+        if conflictos:
+            raise UserError(self.env['salida.acopio.linea']._format_lot_conflicts(conflictos))
 
     def _sync_lot_data(self):
+        """Escribe CRETIB y plan de manejo de las líneas en sus lotes.
+
+        Los lotes con los mismos valores se escriben juntos. Si la escritura
+        de un grupo falla, se reintenta lote por lote para aislar los que
+        fallan. Cada lote con error queda en el log y en
+        ``lotes_sync_errores``; devuelve la lista ``[(lote, error), ...]``.
+        """
+        Lot = self.env['stock.lot']
+        cretib_fields = [f for f in CRETIB_FIELDS if f in Lot._fields]
+        sync_tipo_manejo = 'tipo_manejo_id' in Lot._fields
+        lots_by_vals = {}
         for linea in self.linea_ids:
             if not linea.lote_id:
                 continue
-            lot_vals = {}
-            lot = linea.lote_id
-            cretib_map = {
-                'clasificacion_corrosivo': linea.clasificacion_corrosivo,
-                'clasificacion_reactivo': linea.clasificacion_reactivo,
-                'clasificacion_explosivo': linea.clasificacion_explosivo,
-                'clasificacion_toxico': linea.clasificacion_toxico,
-                'clasificacion_inflamable': linea.clasificacion_inflamable,
-                'clasificacion_biologico': linea.clasificacion_biologico,
-            }
-            for k, v in cretib_map.items():
-                if k in lot._fields:
-                    lot_vals[k] = v
-            if 'tipo_manejo_id' in lot._fields and linea.tipo_manejo_id:
+            lot_vals = {f: linea[f] for f in cretib_fields}
+            if sync_tipo_manejo and linea.tipo_manejo_id:
                 lot_vals['tipo_manejo_id'] = linea.tipo_manejo_id.id
             if lot_vals:
-                try:
-                    lot.sudo().write(lot_vals)
-                except Exception as e:
-                    _logger.warning(f"No se pudo sincronizar datos al lote {lot.name}: {e}")
+                key = tuple(sorted(lot_vals.items()))
+                lots_by_vals[key] = lots_by_vals.get(key, Lot) | linea.lote_id
+
+        errores = []
+        for key, lots in lots_by_vals.items():
+            lot_vals = dict(key)
+            try:
+                with self.env.cr.savepoint():
+                    lots.sudo().write(lot_vals)
+            except Exception:
+                for lot in lots:
+                    try:
+                        with self.env.cr.savepoint():
+                            lot.sudo().write(lot_vals)
+                    except Exception as e:
+                        errores.append((lot, e))
+        detalle = "\n".join(f"• {lot.name}: {e}" for lot, e in errores)
+        if errores:
+            metrics_for(self.env).inc('salida_acopio_lotes_sync_errores_total', len(errores))
+            _logger.warning(
+                f"No se pudo sincronizar datos a {len(errores)} lotes de {self.numero_referencia}:\n{detalle}"
+            )
+        self.lotes_sync_errores = detalle or False
+        return errores
 
     def _build_move_description(self, linea):
         """Construye la descripción del move incluyendo CRETIB, plan de manejo y datos del transporte."""
@@ -328,34 +787,32 @@ class SalidaAcopio(models.Model):
 
     def _create_stock_picking(self):
         location_acopio = self._get_location_acopio()
-        location_customer = self.env.ref('stock.stock_location_customers')
-        picking_type = self.env['stock.picking.type'].search([
-            ('code', '=', 'outgoing'),
-            ('warehouse_id.company_id', '=', self.company_id.id)
-        ], limit=1)
+        config = self._get_acopio_config()
+        location_customer = config['location_dest']
+        picking_type = config['picking_type']
         if not picking_type:
             raise UserError("No se encontró un tipo de operación de salida configurado.")
 
-        _logger.info("[ACOPIO] PASO 1: creando picking vacío")
-        picking = self.env['stock.picking'].create({
-            'picking_type_id': picking_type.id,
-            'location_id': location_acopio.id,
-            'location_dest_id': location_customer.id,
-            'origin': f"Salida Acopio: {self.numero_referencia}",
-            'move_type': 'direct',
-            'company_id': self.company_id.id,
-            'partner_id': self.destinatario_id.id,
-            'salida_acopio_id': self.id,
-            'chofer_id': self.chofer_id.id if self.chofer_id else False,
-            'vehicle_id': self.vehicle_id.id if self.vehicle_id else False,
-            'numero_placa': self.numero_placa or '',
-        })
-        _logger.info(f"[ACOPIO] Picking creado: {picking.id} - {picking.name}")
+        with self._medir_fase('Creación de picking'):
+            _logger.info("[ACOPIO] PASO 1: creando picking vacío")
+            picking = self.env['stock.picking'].create({
+                'picking_type_id': picking_type.id,
+                'location_id': location_acopio.id,
+                'location_dest_id': location_customer.id,
+                'origin': f"Salida Acopio: {self.numero_referencia}",
+                'move_type': 'direct',
+                'company_id': self.company_id.id,
+                'partner_id': self.destinatario_id.id,
+                'salida_acopio_id': self.id,
+                'chofer_id': self.chofer_id.id if self.chofer_id else False,
+                'vehicle_id': self.vehicle_id.id if self.vehicle_id else False,
+                'numero_placa': self.numero_placa or '',
+            })
+            _logger.info(f"[ACOPIO] Picking creado: {picking.id} - {picking.name}")
 
-        moves_created = []
-        for idx, linea in enumerate(self.linea_ids, start=1):
-            _logger.info(f"[ACOPIO] PASO 2.{idx}: creando move para {linea.producto_id.name}")
-            move_vals = {
+            lineas = self.linea_ids
+            _logger.info(f"[ACOPIO] PASO 2: creando {len(lineas)} moves")
+            move_vals_list = [{
                 'product_id': linea.producto_id.id,
                 'product_uom_qty': linea.cantidad,
                 'product_uom': linea.producto_id.uom_id.id,
@@ -365,81 +822,60 @@ class SalidaAcopio(models.Model):
                 'company_id': self.company_id.id,
                 'description_picking': self._build_move_description(linea),
                 'salida_acopio_linea_id': linea.id,
-                'clasificacion_corrosivo': linea.clasificacion_corrosivo,
-                'clasificacion_reactivo': linea.clasificacion_reactivo,
-                'clasificacion_explosivo': linea.clasificacion_explosivo,
-                'clasificacion_toxico': linea.clasificacion_toxico,
-                'clasificacion_inflamable': linea.clasificacion_inflamable,
-                'clasificacion_biologico': linea.clasificacion_biologico,
+                'cretib_mask': linea.cretib_mask,
                 'chofer_id': self.chofer_id.id if self.chofer_id else False,
                 'vehicle_id': self.vehicle_id.id if self.vehicle_id else False,
                 'numero_placa': self.numero_placa or '',
-            }
-            move = self.env['stock.move'].create(move_vals)
-            _logger.info(f"[ACOPIO] Move creado: {move.id}")
-            moves_created.append((move, linea))
-
-        _logger.info("[ACOPIO] PASO 3: action_confirm + action_assign")
-        picking.action_confirm()
-        picking.action_assign()
-
-        for idx, (move, linea) in enumerate(moves_created, start=1):
-            _logger.info(f"[ACOPIO] PASO 4.{idx}: asignando lote/cantidad a move {move.id}")
-            if linea.lote_id:
-                move.move_line_ids.unlink()
-                self.env['stock.move.line'].create({
+            } for linea in lineas]
+            moves = self.env['stock.move'].create(move_vals_list)
+
+        with self._medir_fase('Confirmar y reservar'):
+            _logger.info("[ACOPIO] PASO 3: action_confirm + action_assign")
+            picking.action_confirm()
+            picking.action_assign()
+
+        with self._medir_fase('Líneas de movimiento'):
+            # Los moves no se fusionan entre líneas (ver StockMove._prepare_merge_moves_distinct_fields),
+            # por lo que conservan el orden de las líneas.
+            _logger.info("[ACOPIO] PASO 4: asignando lote/cantidad a los moves")
+            moves_con_lote = moves.filtered(lambda m: m.salida_acopio_linea_id.lote_id)
+            moves_con_lote.move_line_ids.unlink()
+            move_line_vals_list = []
+            move_lines_by_qty = {}
+            for move, linea in zip(moves, lineas):
+                if not linea.lote_id and move.move_line_ids:
+                    move_lines_by_qty.setdefault(linea.cantidad, self.env['stock.move.line'])
+                    move_lines_by_qty[linea.cantidad] |= move.move_line_ids[0]
+                    continue
+                move_line_vals_list.append({
                     'move_id': move.id,
                     'picking_id': picking.id,
                     'product_id': linea.producto_id.id,
-                    'lot_id': linea.lote_id.id,
+                    'lot_id': linea.lote_id.id if linea.lote_id else False,
                     'quantity': linea.cantidad,
                     'product_uom_id': linea.producto_id.uom_id.id,
                     'location_id': location_acopio.id,
                     'location_dest_id': location_customer.id,
                 })
-            else:
-                if move.move_line_ids:
-                    move.move_line_ids[0].quantity = linea.cantidad
-                else:
-                    self.env['stock.move.line'].create({
-                        'move_id': move.id,
-                        'picking_id': picking.id,
-                        'product_id': linea.producto_id.id,
-                        'quantity': linea.cantidad,
-                        'product_uom_id': linea.producto_id.uom_id.id,
-                        'location_id': location_acopio.id,
-                        'location_dest_id': location_customer.id,
-                    })
-
-        # Re-escribir CRETIB y datos del transporte en los moves
-        for move, linea in moves_created:
-            move.write({
-                'clasificacion_corrosivo': linea.clasificacion_corrosivo,
-                'clasificacion_reactivo': linea.clasificacion_reactivo,
-                'clasificacion_explosivo': linea.clasificacion_explosivo,
-                'clasificacion_toxico': linea.clasificacion_toxico,
-                'clasificacion_inflamable': linea.clasificacion_inflamable,
-                'clasificacion_biologico': linea.clasificacion_biologico,
-                'description_picking': self._build_move_description(linea),
-                'chofer_id': self.chofer_id.id if self.chofer_id else False,
-                'vehicle_id': self.vehicle_id.id if self.vehicle_id else False,
-                'numero_placa': self.numero_placa or '',
-            })
-
-        _logger.info("[ACOPIO] PASO 5: marcando moves como picked")
-        if 'picked' in self.env['stock.move']._fields:
-            picking.move_ids.write({'picked': True})
-
-        _logger.info("[ACOPIO] PASO 6: button_validate")
-        try:
-            result = picking.with_context(
-                skip_backorder=True,
-                picking_ids_not_to_backorder=picking.ids,
-                skip_immediate=True,
-            ).button_validate()
-            _logger.info(f"[ACOPIO] button_validate result: {result}")
-        except Exception as e:
-            _logger.warning(f"[ACOPIO] button_validate lanzó excepción: {e}")
+            for cantidad, move_lines in move_lines_by_qty.items():
+                move_lines.quantity = cantidad
+            self.env['stock.move.line'].create(move_line_vals_list)
+
+            _logger.info("[ACOPIO] PASO 5: marcando moves como picked")
+            if 'picked' in self.env['stock.move']._fields:
+                picking.move_ids.write({'picked': True})
+
+        with self._medir_fase('Validación de picking'):
+            _logger.info("[ACOPIO] PASO 6: button_validate")
+            try:
+                result = picking.with_context(
+                    skip_backorder=True,
+                    picking_ids_not_to_backorder=picking.ids,
+                    skip_immediate=True,
+                ).button_validate()
+                _logger.info(f"[ACOPIO] button_validate result: {result}")
+            except Exception as e:
+                _logger.warning(f"[ACOPIO] button_validate lanzó excepción: {e}")
 
         _logger.info(f"[ACOPIO] Picking final state: {picking.state}")
         return picking
@@ -467,9 +903,9 @@ class SalidaAcopio(models.Model):
             _logger.info(f"Partner SAI creado: {sai_partner.name}")
         return sai_partner
 
-    def _create_manifiesto_salida(self):
+    def _create_manifiesto_salida(self, sai_partner=None):
         _logger.info("=== INICIO CREACIÓN MANIFIESTO DE SALIDA ===")
-        sai_partner = self._get_or_create_sai_partner()
+        sai_partner = sai_partner or self._get_or_create_sai_partner()
 
         # Datos del transporte tomados de los relacionales (con fallback al transportista)
         tipo_vehiculo = (
@@ -529,8 +965,9 @@ class SalidaAcopio(models.Model):
         manifiesto = self.env['manifiesto.ambiental'].create(manifiesto_vals)
         _logger.info(f"✅ Manifiesto creado: {manifiesto.numero_manifiesto} (tipo: salida)")
 
+        residuo_vals_list = []
         for linea in self.linea_ids:
-            residuo_vals = {
+            residuo_vals_list.append({
                 'manifiesto_id': manifiesto.id,
                 'product_id': linea.producto_id.id,
                 'lot_id': linea.lote_id.id if linea.lote_id else False,
@@ -543,21 +980,19 @@ class SalidaAcopio(models.Model):
                 'packaging_id': linea.packaging_id.id if linea.packaging_id else False,
                 'etiqueta_si': linea.etiqueta_si,
                 'etiqueta_no': linea.etiqueta_no,
-            }
-            residuo = self.env['manifiesto.ambiental.residuo'].create(residuo_vals)
-            residuo.write({
-                'clasificacion_corrosivo': linea.clasificacion_corrosivo,
-                'clasificacion_reactivo': linea.clasificacion_reactivo,
-                'clasificacion_explosivo': linea.clasificacion_explosivo,
-                'clasificacion_toxico': linea.clasificacion_toxico,
-                'clasificacion_inflamable': linea.clasificacion_inflamable,
-                'clasificacion_biologico': linea.clasificacion_biologico,
+                **_cretib_decode(linea.cretib_mask),
             })
+        # Los valores CRETIB van en el create como booleanos explícitos: así
+        # prevalecen sobre lo que el residuo calcule a partir del producto.
+        self.env['manifiesto.ambiental.residuo'].create(residuo_vals_list)
         _logger.info(f"🎉 FIN CREACIÓN MANIFIESTO: {manifiesto.numero_manifiesto}")
         return manifiesto
 
+    def _get_acopio_config(self):
+        return (self.company_id or self.env.company)._get_salida_acopio_config()
+
     def _get_location_acopio(self):
-        location = _find_location_acopio(self.env, self.company_id.id)
+        location = self._get_acopio_config()['location_acopio']
         if not location:
             raise UserError(
                 "No se encontró una ubicación de tipo interno que contenga 'Acopio' en su nombre. "
@@ -569,6 +1004,8 @@ class SalidaAcopio(models.Model):
         self.ensure_one()
         if self.state == 'done':
             raise UserError("No se puede cancelar una salida ya realizada.")
+        if self.state == 'processing':
+            raise UserError("No se puede cancelar una salida que se está procesando.")
         self.state = 'cancel'
 
     def action_view_picking(self):
@@ -600,18 +1037,24 @@ class SalidaAcopio(models.Model):
 
 class SalidaAcopioLinea(models.Model):
     _name = 'salida.acopio.linea'
+    _inherit = ['salida.acopio.cretib.mixin']
     _description = 'Línea de Salida de Acopio'
 
     salida_id = fields.Many2one(
         'salida.acopio', string='Salida de Acopio',
-        required=True, ondelete='cascade'
+        required=True, ondelete='cascade', index=True,
     )
 
     producto_id = fields.Many2one(
         'product.product', string='Producto/Residuo', required=True,
     )
 
-    lote_id = fields.Many2one('stock.lot', string='Lote')
+    lote_id = fields.Many2one('stock.lot', string='Lote', index='btree_not_null')
+
+    reserva_ids = fields.One2many(
+        'salida.acopio.reserva', 'linea_id',
+        string='Reserva del Lote',
+    )
 
     available_lot_ids = fields.Many2many(
         'stock.lot', string='Lotes Disponibles',
@@ -634,13 +1077,6 @@ class SalidaAcopioLinea(models.Model):
 
     residue_type = fields.Selection(RESIDUE_TYPE_SELECTION, string='Tipo de Residuo')
 
-    clasificacion_corrosivo = fields.Boolean(string='Corrosivo (C)')
-    clasificacion_reactivo = fields.Boolean(string='Reactivo (R)')
-    clasificacion_explosivo = fields.Boolean(string='Explosivo (E)')
-    clasificacion_toxico = fields.Boolean(string='Tóxico (T)')
-    clasificacion_inflamable = fields.Boolean(string='Inflamable (I)')
-    clasificacion_biologico = fields.Boolean(string='Biológico (B)')
-
     clasificaciones_cretib = fields.Char(
         string='Clasificaciones CRETIB',
         compute='_compute_clasificaciones_cretib', store=True,
@@ -656,146 +1092,275 @@ class SalidaAcopioLinea(models.Model):
     etiqueta_si = fields.Boolean(string='Etiqueta - Sí', default=True)
     etiqueta_no = fields.Boolean(string='Etiqueta - No', default=False)
 
+    @api.model_create_multi
+    def create(self, vals_list):
+        lots = self.env['stock.lot'].browse({vals['lote_id'] for vals in vals_list if vals.get('lote_id')})
+        salidas = self.env['salida.acopio'].browse({vals['salida_id'] for vals in vals_list if vals.get('salida_id')})
+        try:
+            with self.env.cr.savepoint():
+                records = super().create(vals_list)
+                records._sync_reservas()
+        except UniqueViolation:
+            self._raise_reserva_conflict(lots, salidas)
+        return records
+
+    def write(self, vals):
+        if 'lote_id' not in vals:
+            return super().write(vals)
+        # El lote relacionado de las reservas existentes cambia con la línea:
+        # la escritura y la sincronización van en el mismo savepoint para que
+        # una violación del índice único se pueda revertir y reportar.
+        lots = self.env['stock.lot'].browse(vals['lote_id'] or [])
+        salidas = self.salida_id
+        try:
+            with self.env.cr.savepoint():
+                res = super().write(vals)
+                self._sync_reservas()
+        except UniqueViolation:
+            self._raise_reserva_conflict(lots, salidas)
+        return res
+
+    def _sync_reservas(self):
+        """Mantiene una reserva por línea con lote.
+
+        El índice único de ``salida.acopio.reserva`` impide que dos salidas
+        activas tomen el mismo lote, incluso si se confirman en paralelo. Se
+        llama dentro del savepoint de ``create``/``write``.
+        """
+        # Las reservas de salidas canceladas quedan inactivas: se leen también
+        # para no duplicarlas; la exclusividad la da el índice único parcial.
+        lineas = self.with_context(active_test=False)
+        con_lote = lineas.filtered('lote_id')
+        (lineas - con_lote).reserva_ids.unlink()
+        faltantes = con_lote.filtered(lambda l: not l.reserva_ids)
+        self.env['salida.acopio.reserva'].create([{'linea_id': l.id} for l in faltantes])
+
+    @api.model
+    def _raise_reserva_conflict(self, lots, salidas):
+        """Reporta los lotes que otra salida reservó primero.
+
+        Se llama después de revertir el savepoint, con el caché ya limpio: los
+        lotes y salidas se capturan antes porque las líneas pueden no existir.
+        """
+        salidas_by_lot = self._get_salidas_by_lot(lots.ids)
+        conflictos = [
+            (lot, otra)
+            for lot in lots
+            for otra in salidas_by_lot.get(lot.id, salidas) - salidas
+        ]
+        raise UserError(self._format_lot_conflicts(conflictos) if conflictos else (
+            "Uno de los lotes acaba de ser reservado en otra salida. Intente de nuevo."
+        ))
+
     def _get_location_acopio(self):
-        return _find_location_acopio(self.env, self.env.company.id)
+        return self.env.company._get_salida_acopio_config()['location_acopio']
+
+    @api.model
+    def _get_salidas_by_lot(self, lot_ids):
+        """Salidas no canceladas que tienen reservado cada lote, en una sola consulta
+        indexada sobre ``salida.acopio.reserva``.
+
+        Devuelve ``{lot_id: salida.acopio}``; la referencia y el estado de las
+        salidas se precargan juntos para poder reportar todos los conflictos.
+        """
+        if not lot_ids:
+            return {}
+        groups = self.env['salida.acopio.reserva']._read_group(
+            [('lot_id', 'in', list(lot_ids))],
+            ['lot_id', 'salida_id'],
+        )
+        salida_ids_by_lot = {}
+        for lot, salida in groups:
+            salida_ids_by_lot.setdefault(lot.id, []).append(salida.id)
+        Salida = self.env['salida.acopio']
+        Salida.browse({sid for ids in salida_ids_by_lot.values() for sid in ids}).fetch(
+            ['numero_referencia', 'state']
+        )
+        return {lot_id: Salida.browse(ids) for lot_id, ids in salida_ids_by_lot.items()}
+
+    @api.model
+    def _format_lot_conflicts(self, conflictos):
+        """Mensaje único con todos los lotes bloqueados: ``[(lot, salida), ...]``."""
+        detalles = []
+        for lot, salida in conflictos:
+            estado = LOT_CONFLICT_ESTADOS.get(salida.state, 'reservado en borrador en')
+            detalles.append(
+                f"• Lote '{lot.name}' del producto '{lot.product_id.name}': "
+                f"{estado} la salida '{salida.numero_referencia}'"
+            )
+        return (
+            f"⚠️ Lotes no disponibles ({len(conflictos)}):\n\n"
+            + "\n".join(detalles)
+            + "\n\nCancele o procese primero esas salidas, o elimine los lotes de esta salida."
+        )
+
+    def _get_acopio_quant_snapshot(self):
+        location_acopio = self._get_location_acopio()
+        if not location_acopio:
+            return None
+        return _get_acopio_quant_snapshot(self.env, location_acopio)
 
     def _get_lots_with_stock_in_acopio(self):
         if not self.producto_id:
             return self.env['stock.lot']
-        location_acopio = self._get_location_acopio()
-        if not location_acopio:
+        snapshot = self._get_acopio_quant_snapshot()
+        if not snapshot:
             return self.env['stock.lot']
-        quants = self.env['stock.quant'].search([
-            ('product_id', '=', self.producto_id.id),
-            ('location_id', '=', location_acopio.id),
-            ('quantity', '>', 0),
-        ])
-        return quants.mapped('lot_id')
+        return self.env['stock.lot'].browse(
+            snapshot['lots_by_product'].get(self.producto_id.id, [])
+        )
 
     @api.depends('salida_id')
     def _compute_available_product_ids(self):
-        location_acopio = None
+        snapshot = self._get_acopio_quant_snapshot()
+        stock_product_ids = list(snapshot['by_product']) if snapshot else []
         for record in self:
-            if not location_acopio:
-                location_acopio = record._get_location_acopio()
-            if not location_acopio:
+            if snapshot is None:
                 record.available_product_ids = [(5, 0, 0)]
                 continue
-            quants = record.env['stock.quant'].search([
-                ('location_id', '=', location_acopio.id),
-                ('quantity', '>', 0),
-            ])
-            product_ids = quants.mapped('product_id').ids
-            if record.producto_id and record.producto_id.id not in product_ids:
+            product_ids = stock_product_ids
+            if record.producto_id and record.producto_id.id not in snapshot['by_product']:
                 product_ids = product_ids + [record.producto_id.id]
             record.available_product_ids = [(6, 0, product_ids)]
 
     @api.depends('producto_id', 'salida_id.linea_ids.lote_id', 'salida_id.linea_ids.producto_id')
     def _compute_available_lot_ids(self):
+        snapshot = self._get_acopio_quant_snapshot()
+        # Lotes usados por cada salida, calculados una vez y no por línea; el
+        # lote propio de la línea se vuelve a agregar más abajo.
+        used_by_salida = {
+            parent: set(parent.linea_ids.lote_id.ids) for parent in self.salida_id
+        }
+        candidates = {}
+        for record in self:
+            if not record.producto_id or not snapshot:
+                continue
+            used_in_same_salida = used_by_salida.get(record.salida_id, ())
+            candidates[record] = {
+                lot_id for lot_id in snapshot['lots_by_product'].get(record.producto_id.id, [])
+                if lot_id not in used_in_same_salida
+            }
+        salidas_by_lot = self.env['salida.acopio.linea']._get_salidas_by_lot(
+            set().union(*candidates.values())
+        )
         for record in self:
             if not record.producto_id:
                 record.available_lot_ids = [(5, 0, 0)]
                 continue
-            stock_lots = record._get_lots_with_stock_in_acopio()
-            available_ids = set(stock_lots.ids)
-            if record.salida_id:
-                used_in_same_salida = record.salida_id.linea_ids.filtered(
-                    lambda l: l.id != record.id and l.lote_id
-                ).mapped('lote_id').ids
-                available_ids -= set(used_in_same_salida)
-            if available_ids:
-                ya_usados = record.env['salida.acopio.linea'].search([
-                    ('lote_id', 'in', list(available_ids)),
-                    ('salida_id', '!=', record.salida_id.id if record.salida_id else False),
-                    ('salida_id.state', 'in', ('draft', 'done')),
-                ]).mapped('lote_id').ids
-                available_ids -= set(ya_usados)
+            salida_actual = record.salida_id._origin
+            available_ids = {
+                lot_id for lot_id in candidates.get(record, ())
+                if not salidas_by_lot.get(lot_id, salida_actual) - salida_actual
+            }
             if record.lote_id:
                 available_ids.add(record.lote_id.id)
             record.available_lot_ids = [(6, 0, list(available_ids))]
 
     @api.depends('producto_id', 'lote_id')
     def _compute_stock_disponible(self):
+        snapshot = self._get_acopio_quant_snapshot()
         for record in self:
-            if not record.producto_id:
-                record.stock_disponible = 0.0
-                continue
-            location_acopio = record._get_location_acopio()
-            if not location_acopio:
+            if not record.producto_id or not snapshot:
                 record.stock_disponible = 0.0
-                continue
-            domain = [
-                ('product_id', '=', record.producto_id.id),
-                ('location_id', '=', location_acopio.id),
-                ('quantity', '>', 0),
-            ]
-            if record.lote_id:
-                domain.append(('lot_id', '=', record.lote_id.id))
-            quants = self.env['stock.quant'].search(domain)
-            record.stock_disponible = sum(quants.mapped('quantity'))
+            elif record.lote_id:
+                record.stock_disponible = snapshot['by_lot'].get(
+                    (record.producto_id.id, record.lote_id.id), 0.0
+                )
+            else:
+                record.stock_disponible = snapshot['by_product'].get(record.producto_id.id, 0.0)
 
-    @api.depends(
-        'clasificacion_corrosivo', 'clasificacion_reactivo', 'clasificacion_explosivo',
-        'clasificacion_toxico', 'clasificacion_inflamable', 'clasificacion_biologico'
-    )
+    @api.depends('cretib_mask')
     def _compute_clasificaciones_cretib(self):
         for record in self:
-            tags = []
-            if record.clasificacion_corrosivo: tags.append('C')
-            if record.clasificacion_reactivo: tags.append('R')
-            if record.clasificacion_explosivo: tags.append('E')
-            if record.clasificacion_toxico: tags.append('T')
-            if record.clasificacion_inflamable: tags.append('I')
-            if record.clasificacion_biologico: tags.append('B')
-            record.clasificaciones_cretib = ', '.join(tags)
+            record.clasificaciones_cretib = _cretib_letters(record.cretib_mask)
+
+    @api.model
+    def _get_product_data(self, products):
+        """Valores de línea tomados del producto, para muchos productos a la vez."""
+        data = {}
+        for prod in products:
+            vals = {'nombre_residuo': prod.name}
+            for f in CRETIB_FIELDS:
+                if f in prod._fields:
+                    vals[f] = prod[f]
+            if 'envase_tipo_default' in prod._fields and prod.envase_tipo_default:
+                vals['envase_tipo'] = prod.envase_tipo_default
+            if 'envase_capacidad_default' in prod._fields and prod.envase_capacidad_default:
+                vals['envase_capacidad'] = str(prod.envase_capacidad_default)
+            data[prod.id] = vals
+        return data
+
+    @api.model
+    def _get_entrada_residuos(self, lots):
+        """Residuo del manifiesto de entrada vigente de cada lote: ``{lot_id: residuo}``.
+
+        Lee el enlace almacenado ``stock.lot.entrada_residuo_id``; los
+        residuos se cargan después juntos por el prefetch del ORM.
+        """
+        lots.fetch(['entrada_residuo_id'])
+        return {lot.id: lot.entrada_residuo_id for lot in lots if lot.entrada_residuo_id}
+
+    @api.model
+    def _get_lot_data(self, lots):
+        """Valores de línea tomados del lote y de su manifiesto de entrada, para muchos lotes a la vez."""
+        residuos = self._get_entrada_residuos(lots)
+        data = {}
+        for lot in lots:
+            vals = {}
+            for f in CRETIB_FIELDS:
+                if f in lot._fields:
+                    vals[f] = lot[f]
+            if 'tipo_manejo_id' in lot._fields and lot.tipo_manejo_id:
+                vals['tipo_manejo_id'] = lot.tipo_manejo_id.id
+            residuo = residuos.get(lot.id)
+            if residuo:
+                vals.update({
+                    'nombre_residuo': residuo.nombre_residuo,
+                    'residue_type': residuo.residue_type or False,
+                    'envase_tipo': residuo.envase_tipo or False,
+                    'envase_cantidad': residuo.envase_cantidad or 1,
+                    'envase_capacidad': residuo.envase_capacidad or '',
+                    'packaging_id': residuo.packaging_id.id if residuo.packaging_id else False,
+                })
+                for f in CRETIB_FIELDS:
+                    if getattr(residuo, f, False):
+                        vals[f] = True
+            data[lot.id] = vals
+        return data
+
+    @api.model
+    def _prepare_vals_from_lots(self, lot_quantities):
+        """Valores completos de línea para ``[(lote, cantidad), ...]``.
+
+        Producto, lote y manifiesto de entrada se leen con consultas por
+        lotes, en el mismo orden en que los aplican los onchange.
+        """
+        lots = self.env['stock.lot'].browse([lot.id for lot, cantidad in lot_quantities])
+        product_data = self._get_product_data(lots.product_id)
+        lot_data = self._get_lot_data(lots)
+        vals_list = []
+        for lot, cantidad in lot_quantities:
+            vals = {
+                'producto_id': lot.product_id.id,
+                'lote_id': lot.id,
+                'cantidad': cantidad,
+            }
+            _merge_loaded_vals(vals, product_data[lot.product_id.id])
+            _merge_loaded_vals(vals, lot_data[lot.id])
+            vals_list.append(vals)
+        return vals_list
 
     def _load_from_product(self):
-        prod = self.producto_id
-        if not prod:
+        if not self.producto_id:
             return
-        if not self.nombre_residuo:
-            self.nombre_residuo = prod.name
-        for f in ('clasificacion_corrosivo', 'clasificacion_reactivo',
-                  'clasificacion_explosivo', 'clasificacion_toxico',
-                  'clasificacion_inflamable', 'clasificacion_biologico'):
-            if hasattr(prod, f) and getattr(prod, f):
-                setattr(self, f, True)
-        if hasattr(prod, 'envase_tipo_default') and prod.envase_tipo_default:
-            self.envase_tipo = prod.envase_tipo_default
-        if hasattr(prod, 'envase_capacidad_default') and prod.envase_capacidad_default:
-            self.envase_capacidad = str(prod.envase_capacidad_default)
+        loaded = self.env['salida.acopio.linea']._get_product_data(self.producto_id)[self.producto_id.id]
+        self.update(_merge_loaded_vals({f: self[f] for f in loaded}, loaded))
 
     def _load_from_lot(self):
-        lot = self.lote_id
-        if not lot:
+        if not self.lote_id:
             return
-        cretib_fields = [
-            'clasificacion_corrosivo', 'clasificacion_reactivo',
-            'clasificacion_explosivo', 'clasificacion_toxico',
-            'clasificacion_inflamable', 'clasificacion_biologico',
-        ]
-        for f in cretib_fields:
-            if f in lot._fields and getattr(lot, f):
-                setattr(self, f, True)
-        if 'tipo_manejo_id' in lot._fields and lot.tipo_manejo_id:
-            self.tipo_manejo_id = lot.tipo_manejo_id.id
-
-        residuo = self.env['manifiesto.ambiental.residuo'].search([
-            ('lot_id', '=', lot.id),
-            ('manifiesto_id.tipo_manifiesto', '=', 'entrada'),
-            ('manifiesto_id.is_current_version', '=', True),
-        ], limit=1, order='id desc')
-        if residuo:
-            if not self.nombre_residuo:
-                self.nombre_residuo = residuo.nombre_residuo
-            self.residue_type = residuo.residue_type or False
-            self.envase_tipo = residuo.envase_tipo or False
-            self.envase_cantidad = residuo.envase_cantidad or 1
-            self.envase_capacidad = residuo.envase_capacidad or ''
-            self.packaging_id = residuo.packaging_id.id if residuo.packaging_id else False
-            for f in cretib_fields:
-                if not getattr(self, f) and getattr(residuo, f, False):
-                    setattr(self, f, True)
+        loaded = self.env['salida.acopio.linea']._get_lot_data(self.lote_id)[self.lote_id.id]
+        self.update(_merge_loaded_vals({f: self[f] for f in loaded}, loaded))
 
     @api.onchange('producto_id')
     def _onchange_producto_id(self):
@@ -830,15 +1395,13 @@ class SalidaAcopioLinea(models.Model):
                     }
                 }
 
-        otras_done = self.env['salida.acopio.linea'].search([
-            ('lote_id', '=', self.lote_id.id),
-            ('salida_id', '!=', self.salida_id.id if self.salida_id else False),
-            ('salida_id.state', 'in', ('draft', 'done')),
-        ], limit=1)
-        if otras_done:
-            estado = 'ya entregado en' if otras_done.salida_id.state == 'done' else 'reservado en borrador en'
+        salida_actual = self.salida_id._origin
+        otras = self._get_salidas_by_lot(self.lote_id.ids).get(self.lote_id.id, salida_actual) - salida_actual
+        if otras:
+            otra = otras[:1]
+            estado = LOT_CONFLICT_ESTADOS.get(otra.state, 'reservado en borrador en')
             lote_name = self.lote_id.name
-            ref = otras_done.salida_id.numero_referencia
+            ref = otra.numero_referencia
             self.lote_id = False
             self.cantidad = 0.0
             return {
@@ -851,15 +1414,9 @@ class SalidaAcopioLinea(models.Model):
                 }
             }
 
-        location_acopio = self._get_location_acopio()
-        if location_acopio:
-            quants = self.env['stock.quant'].search([
-                ('product_id', '=', self.producto_id.id),
-                ('location_id', '=', location_acopio.id),
-                ('lot_id', '=', self.lote_id.id),
-                ('quantity', '>', 0),
-            ])
-            disponible = sum(quants.mapped('quantity'))
+        snapshot = self._get_acopio_quant_snapshot()
+        if snapshot:
+            disponible = snapshot['by_lot'].get((self.producto_id.id, self.lote_id.id), 0.0)
             self.stock_disponible = disponible
             if disponible > 0 and self.cantidad == 0.0:
                 self.cantidad = disponible
@@ -887,17 +1444,14 @@ class SalidaAcopioLinea(models.Model):
 
     @api.constrains('lote_id', 'producto_id', 'salida_id')
     def _check_lote_unico_en_salida(self):
-        for record in self:
-            if not record.lote_id or not record.salida_id:
-                continue
-            duplicados = record.salida_id.linea_ids.filtered(
-                lambda l: l != record
-                and l.lote_id
-                and l.lote_id.id == record.lote_id.id
-            )
-            if duplicados:
+        for salida in self.salida_id:
+            lotes_vistos = set()
+            for linea in salida.linea_ids.filtered('lote_id'):
+                if linea.lote_id.id not in lotes_vistos:
+                    lotes_vistos.add(linea.lote_id.id)
+                    continue
                 raise ValidationError(
-                    f"⚠️ El lote '{record.lote_id.name}' (producto '{record.producto_id.name}') "
+                    f"⚠️ El lote '{linea.lote_id.name}' (producto '{linea.producto_id.name}') "
                     f"ya está incluido en otra línea de esta salida. "
                     f"Cada lote solo puede aparecer una vez."
                 )
\ No newline at end of file
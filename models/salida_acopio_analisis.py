@@ -0,0 +1,75 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, tools
+
+from .salida_acopio import RESIDUE_TYPE_SELECTION
+
+
+class SalidaAcopioAnalisis(models.Model):
+    """Permanencia de lotes en acopio y volumen de salida, calculados en SQL.
+
+    Una fila por línea de salida; el manifiesto de entrada se toma del enlace
+    almacenado ``stock.lot.entrada_residuo_id``, así que la vista solo hace
+    joins por clave primaria y agrega en la base de datos.
+    """
+    _name = 'salida.acopio.analisis'
+    _description = 'Análisis de Salidas de Acopio'
+    _auto = False
+    _rec_name = 'salida_id'
+    _order = 'fecha_salida desc'
+
+    salida_id = fields.Many2one('salida.acopio', string='Salida de Acopio', readonly=True)
+    fecha_salida = fields.Datetime(string='Fecha de Salida', readonly=True)
+    fecha_entrada = fields.Date(string='Fecha de Entrada', readonly=True)
+    state = fields.Selection([
+        ('draft', 'Borrador'),
+        ('processing', 'Procesando'),
+        ('done', 'Realizada'),
+        ('cancel', 'Cancelada'),
+    ], string='Estado', readonly=True)
+    company_id = fields.Many2one('res.company', string='Compañía', readonly=True)
+    destinatario_id = fields.Many2one('res.partner', string='Destinatario Final', readonly=True)
+    transportista_id = fields.Many2one('res.partner', string='Transportista', readonly=True)
+    producto_id = fields.Many2one('product.product', string='Producto', readonly=True)
+    lote_id = fields.Many2one('stock.lot', string='Lote', readonly=True)
+    manifiesto_entrada_id = fields.Many2one('manifiesto.ambiental', string='Manifiesto de Entrada', readonly=True)
+    residue_type = fields.Selection(RESIDUE_TYPE_SELECTION, string='Tipo de Residuo', readonly=True)
+    tipo_manejo_id = fields.Many2one('residuo.tipo.manejo', string='Plan de Manejo', readonly=True)
+    cretib_mask = fields.Integer(string='Máscara CRETIB', readonly=True, aggregator=None)
+    cantidad = fields.Float(string='Cantidad (kg)', readonly=True)
+    numero_lotes = fields.Integer(string='Lotes', readonly=True)
+    dias_en_acopio = fields.Float(
+        string='Días en Acopio (promedio)', readonly=True, aggregator='avg',
+        help='Días entre la fecha del manifiesto de entrada del lote y la salida.',
+    )
+    dias_en_acopio_max = fields.Integer(string='Días en Acopio (máximo)', readonly=True, aggregator='max')
+
+    def init(self):
+        tools.drop_view_if_exists(self.env.cr, self._table)
+        self.env.cr.execute(f"""
+            CREATE OR REPLACE VIEW {self._table} AS (
+                SELECT
+                    l.id AS id,
+                    l.salida_id AS salida_id,
+                    s.fecha_salida AS fecha_salida,
+                    COALESCE(m.generador_fecha, m.create_date::date) AS fecha_entrada,
+                    s.state AS state,
+                    s.company_id AS company_id,
+                    s.destinatario_id AS destinatario_id,
+                    s.transportista_id AS transportista_id,
+                    l.producto_id AS producto_id,
+                    l.lote_id AS lote_id,
+                    m.id AS manifiesto_entrada_id,
+                    l.residue_type AS residue_type,
+                    l.tipo_manejo_id AS tipo_manejo_id,
+                    l.cretib_mask AS cretib_mask,
+                    l.cantidad AS cantidad,
+                    CASE WHEN l.lote_id IS NOT NULL THEN 1 ELSE 0 END AS numero_lotes,
+                    s.fecha_salida::date - COALESCE(m.generador_fecha, m.create_date::date) AS dias_en_acopio,
+                    s.fecha_salida::date - COALESCE(m.generador_fecha, m.create_date::date) AS dias_en_acopio_max
+                FROM salida_acopio_linea l
+                JOIN salida_acopio s ON s.id = l.salida_id
+                LEFT JOIN stock_lot lot ON lot.id = l.lote_id
+                LEFT JOIN manifiesto_ambiental_residuo r ON r.id = lot.entrada_residuo_id
+                LEFT JOIN manifiesto_ambiental m ON m.id = r.manifiesto_id
+            )
+        """)
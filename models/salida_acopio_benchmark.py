@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+from odoo.exceptions import UserError
+from contextlib import contextmanager
+import json
+import logging
+import time
+
+from .salida_acopio import _invalidate_acopio_quant_snapshot
+from .salida_acopio_metrics import NO_METRICS_CONTEXT_KEY
+
+_logger = logging.getLogger(__name__)
+
+BENCHMARK_SIZES = (10, 100, 1000)
+BENCHMARK_PREFIX = 'BENCH-SAI'
+
+
+class SalidaAcopioBenchmark(models.AbstractModel):
+    """Mediciones reproducibles de la salida de acopio con datos sintéticos.
+
+    Uso desde ``odoo-bin shell``::
+
+        print(env['salida.acopio.benchmark'].run_benchmark())
+
+    Cada tamaño corre dentro de un savepoint que se revierte al final, así
+    que los registros desaparecen al terminar. Las salidas llevan una
+    referencia sintética y las métricas en proceso quedan desactivadas,
+    pero los pickings sí toman números de la secuencia del tipo de
+    operación de salida y ``nextval`` no se revierte: correr solo en una
+    copia de la base de datos, por eso no hay entrada de menú.
+    """
+    _name = 'salida.acopio.benchmark'
+    _description = 'Benchmark de Salida de Acopio'
+
+    # -------------------------------------------------------------------------
+    # Datos sintéticos
+    # -------------------------------------------------------------------------
+
+    @api.model
+    def _generate_data(self, size):
+        """Producto con lotes, existencias en acopio y manifiestos de entrada.
+
+        Se generan ``2 * size`` lotes: la mitad para la confirmación completa
+        y la otra mitad para medir picking y manifiesto por separado.
+        """
+        location = self.env.company._get_salida_acopio_config()['location_acopio']
+        if not location:
+            raise UserError("No se encontró una ubicación de tipo interno que contenga 'Acopio' en su nombre.")
+        stamp = f"{BENCHMARK_PREFIX}-{size}-{int(time.time() * 1000)}"
+        Partner = self.env['res.partner']
+        generador = Partner.create({'name': f'{stamp} Generador', 'is_company': True})
+        destinatario = Partner.create({'name': f'{stamp} Destinatario', 'is_company': True})
+        product = self.env['product.product'].create({
+            'name': f'{stamp} Residuo',
+            'type': 'consu',
+            'is_storable': True,
+            'tracking': 'lot',
+        })
+        lots = self.env['stock.lot'].create([{
+            'name': f'{stamp}-{i:05d}',
+            'product_id': product.id,
+            'company_id': self.env.company.id,
+        } for i in range(2 * size)])
+        Quant = self.env['stock.quant']
+        for lot in lots:
+            Quant._update_available_quantity(product, location, 10.0, lot_id=lot)
+        manifiesto = self.env['manifiesto.ambiental'].create({
+            'tipo_manifiesto': 'entrada',
+            'numero_manifiesto': f'{stamp}-ENT',
+            'generador_id': generador.id,
+            'generador_nombre': generador.name,
+            'company_id': self.env.company.id,
+        })
+        self.env['manifiesto.ambiental.residuo'].create([{
+            'manifiesto_id': manifiesto.id,
+            'product_id': product.id,
+            'lot_id': lot.id,
+            'nombre_residuo': product.name,
+            'cantidad': 10.0,
+            'residue_type': 'rp',
+            'clasificacion_toxico': True,
+        } for lot in lots])
+        self.env.flush_all()
+        _invalidate_acopio_quant_snapshot(self.env)
+        return {
+            'stamp': stamp,
+            'transportista': generador,
+            'destinatario': destinatario,
+            'lots': lots,
+        }
+
+    # -------------------------------------------------------------------------
+    # Escenarios
+    # -------------------------------------------------------------------------
+
+    @contextmanager
+    def _measure(self, results, name):
+        """Registra duración y número de consultas SQL del bloque en ``results``."""
+        cr = self.env.cr
+        queries = cr.sql_log_count
+        inicio = time.perf_counter()
+        yield
+        self.env.flush_all()
+        results[name] = {
+            'seconds': round(time.perf_counter() - inicio, 4),
+            'queries': cr.sql_log_count - queries,
+        }
+
+    def _new_salida(self, data, lots, sufijo):
+        vals_list = self.env['salida.acopio.linea']._prepare_vals_from_lots([(lot, 10.0) for lot in lots])
+        return self.env['salida.acopio'].create({
+            'numero_referencia': f"{data['stamp']}-{sufijo}",
+            'transportista_id': data['transportista'].id,
+            'destinatario_id': data['destinatario'].id,
+            'linea_ids': [fields.Command.create(vals) for vals in vals_list],
+        })
+
+    @api.model
+    def _run_size(self, size, include_pdf=False):
+        results = {}
+        with self._measure(results, 'generate_data'):
+            data = self._generate_data(size)
+        lots_a, lots_b = data['lots'][:size], data['lots'][size:]
+
+        vals_list = self.env['salida.acopio.linea']._prepare_vals_from_lots([(lot, 10.0) for lot in lots_a])
+        wizard = self.env['salida.acopio.wizard'].create({
+            'transportista_id': data['transportista'].id,
+            'destinatario_id': data['destinatario'].id,
+            'linea_ids': [fields.Command.create(vals) for vals in vals_list],
+        })
+        self.env.invalidate_all()
+        _invalidate_acopio_quant_snapshot(self.env)
+        with self._measure(results, 'wizard_line_computes'):
+            wizard.linea_ids.mapped('available_product_ids')
+            wizard.linea_ids.mapped('available_lot_ids')
+            wizard.linea_ids.mapped('stock_disponible')
+
+        salida = self._new_salida(data, lots_a, 'A')
+        with self._measure(results, 'action_confirmar_salida'):
+            salida.action_confirmar_salida()
+
+        salida_b = self._new_salida(data, lots_b, 'B')
+        salida_b._sync_lot_data()
+        with self._measure(results, '_create_manifiesto_salida'):
+            manifiesto = salida_b._create_manifiesto_salida()
+        with self._measure(results, '_create_stock_picking'):
+            salida_b._create_stock_picking()
+
+        report = self.env.ref('salida_acopio_manifiesto.action_report_manifiesto_salida')
+        with self._measure(results, 'report_html'):
+            report._render_qweb_html(report.report_name, manifiesto.ids)
+        if include_pdf:
+            with self._measure(results, 'report_pdf'):
+                report.with_context(report_pdf_no_attachment=True)._render_qweb_pdf(
+                    report.report_name, manifiesto.ids
+                )
+        return results
+
+    @api.model
+    def run_benchmark(self, sizes=BENCHMARK_SIZES, include_pdf=False):
+        """Corre todos los escenarios para cada tamaño y devuelve el resultado en JSON."""
+        if not self.env.is_superuser() and not self.env.user.has_group('base.group_system'):
+            raise UserError("Solo un administrador puede ejecutar el benchmark.")
+        self = self.with_context(**{NO_METRICS_CONTEXT_KEY: True})
+        cr = self.env.cr
+        salida = {
+            'database': cr.dbname,
+            'timestamp': fields.Datetime.to_string(fields.Datetime.now()),
+            'include_pdf': include_pdf,
+            'sizes': {},
+        }
+        for size in sizes:
+            with cr.savepoint() as savepoint:
+                try:
+                    salida['sizes'][str(size)] = self._run_size(size, include_pdf=include_pdf)
+                finally:
+                    # Descarta los datos sintéticos y lo que quede en el caché del ORM
+                    savepoint.rollback()
+                    _invalidate_acopio_quant_snapshot(self.env)
+            _logger.info(f"Benchmark salida acopio ({size} líneas): {salida['sizes'][str(size)]}")
+        return json.dumps(salida, indent=2, sort_keys=True)
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+from odoo import models, api
+from odoo.tools.sql import make_index_name
+import logging
+
+_logger = logging.getLogger(__name__)
+
+# (modelo, campo) de las consultas frecuentes del módulo
+EXPECTED_INDEXES = [
+    ('salida.acopio', 'numero_referencia'),
+    ('salida.acopio', 'numero_placa'),
+    ('salida.acopio.linea', 'salida_id'),
+    ('salida.acopio.linea', 'lote_id'),
+    ('salida.acopio.reserva', 'lot_id'),
+    ('salida.acopio.reserva', 'linea_id'),
+    ('stock.move', 'salida_acopio_linea_id'),
+    ('stock.picking', 'salida_acopio_id'),
+    ('manifiesto.ambiental', 'generador_nombre'),
+]
+
+
+class SalidaAcopioIndexes(models.Model):
+    _inherit = 'salida.acopio'
+
+    @api.model
+    def _get_missing_indexes(self):
+        """Devuelve ``[(modelo, campo, nombre_indice), ...]`` de los índices esperados que no existen."""
+        expected = {
+            make_index_name(self.env[model]._table, field): (model, field)
+            for model, field in EXPECTED_INDEXES
+        }
+        self.env.cr.execute(
+            "SELECT indexname FROM pg_indexes WHERE indexname IN %s",
+            [tuple(expected)],
+        )
+        existing = {row[0] for row in self.env.cr.fetchall()}
+        return [(*expected[name], name) for name in expected if name not in existing]
+
+    def _register_hook(self):
+        super()._register_hook()
+        for model, field, name in self._get_missing_indexes():
+            _logger.warning(f"[ACOPIO] Falta el índice {name} ({model}.{field})")
+
+    @api.model
+    def action_check_indexes(self):
+        missing = self._get_missing_indexes()
+        if missing:
+            message = "Faltan los índices:\n" + "\n".join(
+                f"• {model}.{field} ({name})" for model, field, name in missing
+            ) + "\n\nActualice el módulo para crearlos; los índices trigram requieren la extensión pg_trgm."
+        else:
+            message = f"Los {len(EXPECTED_INDEXES)} índices esperados existen."
+        return {
+            'type': 'ir.actions.client',
+            'tag': 'display_notification',
+            'params': {
+                'title': 'Índices de Salidas de Acopio',
+                'message': message,
+                'type': 'warning' if missing else 'success',
+                'sticky': bool(missing),
+            }
+        }
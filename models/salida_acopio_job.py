@@ -0,0 +1,132 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+
+from odoo.tools import config
+from datetime import timedelta
+import logging
+
+from .salida_acopio import _invalidate_acopio_quant_snapshot
+
+_logger = logging.getLogger(__name__)
+
+ASYNC_THRESHOLD_PARAM = 'salida_acopio_manifiesto.async_line_threshold'
+# Minutos tras los cuales un job en "Procesando" se da por interrumpido
+STALE_JOB_MINUTES_PARAM = 'salida_acopio_manifiesto.stale_job_minutes'
+
+
+class SalidaAcopioJob(models.Model):
+    _name = 'salida.acopio.job'
+    _description = 'Confirmación de Salida de Acopio en Cola'
+    _order = 'id desc'
+    _rec_name = 'salida_id'
+
+    salida_id = fields.Many2one(
+        'salida.acopio', string='Salida de Acopio',
+        required=True, ondelete='cascade', index=True,
+    )
+
+    state = fields.Selection([
+        ('pending', 'En Cola'),
+        ('running', 'Procesando'),
+        ('done', 'Terminado'),
+        ('failed', 'Fallido'),
+    ], string='Estado', default='pending', required=True, index=True)
+
+    progreso = fields.Integer(string='Progreso (%)', default=0)
+    fase = fields.Char(string='Fase Actual')
+    error = fields.Text(string='Error')
+
+    fecha_inicio = fields.Datetime(string='Inicio')
+    fecha_fin = fields.Datetime(string='Fin')
+
+    @api.model
+    def _cron_process_jobs(self, limit=5):
+        """Procesa confirmaciones pendientes, una transacción por salida."""
+        self._recover_stale_jobs()
+        jobs = self.search([('state', '=', 'pending')], order='id', limit=limit)
+        for job in jobs:
+            job._run()
+        if self.search_count([('state', '=', 'pending')], limit=1):
+            self.env.ref('salida_acopio_manifiesto.ir_cron_salida_acopio_jobs')._trigger()
+
+    @api.model
+    def _get_stale_job_minutes(self):
+        """Límite de un job en ejecución: el parámetro o, si no existe, el doble
+        del tiempo real permitido a los crons (mínimo 10 minutos)."""
+        minutos = int(self.env['ir.config_parameter'].sudo().get_param(STALE_JOB_MINUTES_PARAM, 0) or 0)
+        if minutos > 0:
+            return minutos
+        limite = config.get('limit_time_real_cron') or -1
+        if limite <= 0:
+            limite = config.get('limit_time_real') or 120
+        return max(10, 2 * limite // 60)
+
+    @api.model
+    def _recover_stale_jobs(self):
+        """Marca como fallidos los jobs cortados a media ejecución.
+
+        Si el worker alcanzó su límite de tiempo, su transacción se revirtió
+        y el job quedó en "Procesando" con la salida bloqueada; la salida
+        vuelve a borrador para que se pueda reintentar o cancelar.
+        """
+        limite = fields.Datetime.now() - timedelta(minutes=self._get_stale_job_minutes())
+        stale = self.search([('state', '=', 'running'), ('fecha_inicio', '<', limite)])
+        if not stale:
+            return
+        _logger.warning(f"Recuperando {len(stale)} confirmaciones en cola interrumpidas: {stale.ids}")
+        stale.write({
+            'state': 'failed',
+            'error': 'La confirmación se interrumpió (límite de tiempo del worker); reintente o cancele la salida.',
+            'fecha_fin': fields.Datetime.now(),
+        })
+        stale.salida_id.filtered(lambda s: s.state == 'processing').write({'state': 'draft'})
+        self.env.cr.commit()
+
+    def _run(self):
+        self.ensure_one()
+        self.write({
+            'state': 'running',
+            'progreso': 0,
+            'fase': 'Iniciando',
+            'error': False,
+            'fecha_inicio': fields.Datetime.now(),
+        })
+        self.env.cr.commit()
+
+        salida = self.salida_id.with_user(self.create_uid).with_company(self.salida_id.company_id)
+        try:
+            # La validación se mide aquí: es la que cuenta para la confirmación
+            # y queda en el mismo commit que el resto de las fases.
+            salida._iniciar_medicion()
+            with salida._medir_fase('Validación'):
+                salida._check_datos_confirmacion()
+            salida._confirmar_salida(progress=self._report_progress)
+            # Se confirma la salida antes de tocar el job: la fila del job se
+            # actualiza en paralelo desde _report_progress.
+            self.env.cr.commit()
+            self.write({
+                'state': 'done',
+                'progreso': 100,
+                'fase': 'Terminado',
+                'fecha_fin': fields.Datetime.now(),
+            })
+        except Exception as e:
+            self.env.cr.rollback()
+            self.env.invalidate_all()
+            _invalidate_acopio_quant_snapshot(self.env)
+            _logger.exception(f"Error al confirmar en cola la salida {self.salida_id.numero_referencia}")
+            self.write({
+                'state': 'failed',
+                'error': str(e),
+                'fecha_fin': fields.Datetime.now(),
+            })
+            self.salida_id.state = 'draft'
+        self.env.cr.commit()
+
+    def _report_progress(self, fase, progreso):
+        """Publica la fase en curso desde un cursor propio, visible antes del commit."""
+        with self.env.registry.cursor() as cr:
+            cr.execute(
+                "UPDATE salida_acopio_job SET fase = %s, progreso = %s WHERE id = %s",
+                (fase, progreso, self.id),
+            )
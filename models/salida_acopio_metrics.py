@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+"""Métricas en proceso de la salida de acopio, en formato de texto Prometheus.
+
+Cada worker de Odoo acumula sus propios valores; Prometheus debe sumar las
+series de todos los workers (por ejemplo con ``sum without(instance)``).
+Registrar un valor solo toma un lock y actualiza unos cuantos números, así
+que se puede llamar desde las rutas de confirmación sin costo apreciable.
+"""
+import bisect
+import os
+import threading
+
+# Límites superiores de los buckets de cada histograma
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+LINES_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500)
+
+# Clave de contexto que desactiva el registro (benchmark, pruebas)
+NO_METRICS_CONTEXT_KEY = 'salida_acopio_no_metrics'
+
+METRICS = {
+    'salida_acopio_confirmaciones_total': ('counter', 'Salidas de acopio confirmadas.', None),
+    'salida_acopio_kg_total': ('counter', 'Kilogramos entregados en salidas confirmadas.', None),
+    'salida_acopio_validaciones_fallidas_total': ('counter', 'Confirmaciones rechazadas por validación.', None),
+    'salida_acopio_fase_errores_total': ('counter', 'Errores por fase de confirmación.', None),
+    'salida_acopio_lotes_sync_errores_total': ('counter', 'Lotes que no se pudieron sincronizar.', None),
+    'salida_acopio_lineas_por_salida': ('histogram', 'Líneas por salida confirmada.', LINES_BUCKETS),
+    'salida_acopio_confirmacion_segundos': ('histogram', 'Duración de la confirmación de una salida.', LATENCY_BUCKETS),
+    'salida_acopio_reporte_segundos': ('histogram', 'Duración del renderizado del manifiesto de salida.', LATENCY_BUCKETS),
+}
+
+
+class _Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        buckets = METRICS[name][2]
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            counts, total = self._histograms.get(key, ([0] * (len(buckets) + 1), 0.0))
+            counts[bisect.bisect_left(buckets, value)] += 1
+            self._histograms[key] = (counts, total + value)
+
+    def render(self):
+        """Exposición en formato de texto Prometheus 0.0.4."""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {k: (list(c), t) for k, (c, t) in self._histograms.items()}
+        pid = str(os.getpid())
+        lines = []
+        for name, (kind, doc, buckets) in METRICS.items():
+            lines.append(f"# HELP {name} {doc}")
+            lines.append(f"# TYPE {name} {kind}")
+            if kind == 'counter':
+                for (metric, labels), value in sorted(counters.items()):
+                    if metric == name:
+                        lines.append(f"{name}{_labels(labels, pid=pid)} {value}")
+                continue
+            for (metric, labels), (counts, total) in sorted(histograms.items()):
+                if metric != name:
+                    continue
+                acumulado = 0
+                for limite, count in zip(buckets + ('+Inf',), counts):
+                    acumulado += count
+                    lines.append(f"{name}_bucket{_labels(labels, pid=pid, le=limite)} {acumulado}")
+                lines.append(f"{name}_sum{_labels(labels, pid=pid)} {total}")
+                lines.append(f"{name}_count{_labels(labels, pid=pid)} {acumulado}")
+        return "\n".join(lines) + "\n"
+
+
+def _labels(labels, **extra):
+    items = list(labels) + sorted(extra.items())
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in items) + '}'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class _NullRegistry:
+    def inc(self, name, value=1, **labels):
+        pass
+
+    def observe(self, name, value, **labels):
+        pass
+
+
+metrics = _Registry()
+_null_metrics = _NullRegistry()
+
+
+def metrics_for(env):
+    """Registro a usar con ``env``: uno nulo si el contexto trae ``NO_METRICS_CONTEXT_KEY``."""
+    return _null_metrics if env.context.get(NO_METRICS_CONTEXT_KEY) else metrics
@@ -13,4 +13,18 @@ class SalidaAcopioPrint(models.Model):
             raise UserError(_("No hay manifiesto de salida asociado a este registro."))
         return self.env.ref(
             'salida_acopio_manifiesto.action_report_manifiesto_salida'
-        ).report_action(self.manifiesto_salida_id)
\ No newline at end of file
+        ).report_action(self.manifiesto_salida_id)
+
+    def action_imprimir_manifiestos_lote(self):
+        """Abre el asistente de impresión por lotes con las salidas seleccionadas."""
+        salidas = self.filtered('manifiesto_salida_id')
+        if not salidas:
+            raise UserError(_("Ninguna de las salidas seleccionadas tiene manifiesto de salida."))
+        return {
+            'name': _('Imprimir Manifiestos de Salida'),
+            'type': 'ir.actions.act_window',
+            'res_model': 'salida.acopio.print.batch',
+            'view_mode': 'form',
+            'target': 'new',
+            'context': {'default_salida_ids': salidas.ids},
+        }
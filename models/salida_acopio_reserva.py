@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+
+
+class SalidaAcopioReserva(models.Model):
+    _name = 'salida.acopio.reserva'
+    _description = 'Reserva de Lote en Salida de Acopio'
+    _rec_name = 'lot_id'
+
+    linea_id = fields.Many2one(
+        'salida.acopio.linea', string='Línea de Salida',
+        required=True, ondelete='cascade', index=True,
+    )
+
+    lot_id = fields.Many2one(
+        'stock.lot', string='Lote',
+        related='linea_id.lote_id', store=True, index=True,
+    )
+
+    salida_id = fields.Many2one(
+        'salida.acopio', string='Salida de Acopio',
+        related='linea_id.salida_id', store=True, index=True,
+    )
+
+    state = fields.Selection(
+        related='salida_id.state', store=True, string='Estado',
+    )
+
+    # Una salida cancelada libera sus lotes; las demás los mantienen
+    # reservados (borrador / procesando) o entregados (realizada).
+    active = fields.Boolean(
+        string='Activa',
+        compute='_compute_active', store=True,
+    )
+
+    _lot_activo_uniq = models.UniqueIndex(
+        '(lot_id) WHERE active IS TRUE AND lot_id IS NOT NULL',
+        'El lote ya está reservado o entregado en otra salida de acopio.',
+    )
+
+    @api.depends('salida_id.state')
+    def _compute_active(self):
+        for record in self:
+            record.active = record.salida_id.state != 'cancel'
@@ -0,0 +1,17 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+
+
+class SalidaAcopioStat(models.Model):
+    _name = 'salida.acopio.stat'
+    _description = 'Tiempos de Confirmación de Salida de Acopio'
+    _order = 'salida_id, secuencia'
+
+    salida_id = fields.Many2one(
+        'salida.acopio', string='Salida de Acopio',
+        required=True, ondelete='cascade', index=True,
+    )
+    secuencia = fields.Integer(string='Secuencia')
+    fase = fields.Char(string='Fase', required=True)
+    duracion = fields.Float(string='Duración (ms)', digits=(16, 1))
+    consultas = fields.Integer(string='Consultas SQL')
@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+from odoo import models, api
+
+# Campos que cambian el resultado de res.company._get_salida_acopio_config_ids
+ACOPIO_LOCATION_FIELDS = {'name', 'location_id', 'usage', 'company_id', 'active'}
+ACOPIO_PICKING_TYPE_FIELDS = {'code', 'warehouse_id', 'company_id', 'active', 'sequence'}
+
+
+class StockLocation(models.Model):
+    _inherit = 'stock.location'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        # Solo las ubicaciones internas pueden ser la de acopio
+        if any(location.usage == 'internal' for location in records):
+            self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if ACOPIO_LOCATION_FIELDS.intersection(vals):
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        internas = any(location.usage == 'internal' for location in self)
+        res = super().unlink()
+        if internas:
+            self.env.registry.clear_cache()
+        return res
+
+
+class StockPickingType(models.Model):
+    _inherit = 'stock.picking.type'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        # Solo los tipos de salida entran en la configuración de acopio
+        if any(picking_type.code == 'outgoing' for picking_type in records):
+            self.env.registry.clear_cache()
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        if ACOPIO_PICKING_TYPE_FIELDS.intersection(vals):
+            self.env.registry.clear_cache()
+        return res
+
+    def unlink(self):
+        salidas = any(picking_type.code == 'outgoing' for picking_type in self)
+        res = super().unlink()
+        if salidas:
+            self.env.registry.clear_cache()
+        return res
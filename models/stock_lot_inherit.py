@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields, api
+from odoo.tools.sql import column_exists, create_column, table_exists
+
+
+class StockLot(models.Model):
+    _inherit = 'stock.lot'
+
+    manifiesto_residuo_ids = fields.One2many(
+        'manifiesto.ambiental.residuo', 'lot_id',
+        string='Residuos en Manifiestos',
+    )
+
+    # Residuo del manifiesto de entrada vigente; se recalcula cuando un
+    # manifiesto cambia de tipo o de versión, así que elegir un lote es una
+    # lectura por clave primaria en lugar de un search con joins.
+    entrada_residuo_id = fields.Many2one(
+        'manifiesto.ambiental.residuo',
+        string='Residuo de Entrada Vigente',
+        compute='_compute_entrada_residuo_id',
+        store=True,
+        index='btree_not_null',
+    )
+
+    def _auto_init(self):
+        # Crear y llenar la columna con un solo UPDATE evita que el ORM
+        # recalcule el campo lote por lote al instalar el módulo.
+        cr = self.env.cr
+        if not column_exists(cr, self._table, 'entrada_residuo_id'):
+            create_column(cr, self._table, 'entrada_residuo_id', 'int4')
+            if (
+                table_exists(cr, 'manifiesto_ambiental_residuo')
+                and column_exists(cr, 'manifiesto_ambiental', 'is_current_version')
+            ):
+                cr.execute(f"""
+                    UPDATE {self._table} l
+                       SET entrada_residuo_id = sub.id
+                      FROM (
+                            SELECT DISTINCT ON (r.lot_id) r.lot_id, r.id
+                              FROM manifiesto_ambiental_residuo r
+                              JOIN manifiesto_ambiental m ON m.id = r.manifiesto_id
+                             WHERE r.lot_id IS NOT NULL
+                               AND m.tipo_manifiesto = 'entrada'
+                               AND m.is_current_version
+                          ORDER BY r.lot_id, r.id DESC
+                           ) sub
+                     WHERE l.id = sub.lot_id
+                """)
+        return super()._auto_init()
+
+    @api.depends(
+        'manifiesto_residuo_ids.manifiesto_id.tipo_manifiesto',
+        'manifiesto_residuo_ids.manifiesto_id.is_current_version',
+    )
+    def _compute_entrada_residuo_id(self):
+        for lot in self:
+            residuos = lot.manifiesto_residuo_ids.filtered(
+                lambda r: r.manifiesto_id.tipo_manifiesto == 'entrada'
+                and r.manifiesto_id.is_current_version
+            )
+            lot.entrada_residuo_id = max(residuos, key=lambda r: r.id) if residuos else False
@@ -1,5 +1,8 @@
 # -*- coding: utf-8 -*-
 from odoo import models, fields, api
+from odoo.tools.sql import column_exists, create_column
+
+from .salida_acopio import _cretib_letters
 
 
 class StockPicking(models.Model):
@@ -8,12 +11,16 @@ class StockPicking(models.Model):
     salida_acopio_id = fields.Many2one(
         'salida.acopio',
         string='Salida de Acopio',
-        help='Salida de acopio que generó esta transferencia'
+        help='Salida de acopio que generó esta transferencia',
+        index='btree_not_null',
     )
 
+    # Almacenado para poder agrupar; el filtro "Salidas de Acopio" busca por
+    # salida_acopio_id, que ya tiene índice parcial (IS NOT NULL).
     es_salida_acopio = fields.Boolean(
         string='Es Salida de Acopio',
         compute='_compute_es_salida_acopio',
+        store=True,
     )
 
     chofer_id = fields.Many2one(
@@ -33,27 +40,39 @@ class StockPicking(models.Model):
         string='Número de Placa',
     )
 
+    def _auto_init(self):
+        # En tablas grandes, crear y llenar la columna con SQL evita que el ORM
+        # recalcule el campo registro por registro al instalar/actualizar.
+        # En una instalación nueva salida_acopio_id todavía no existe y no hay
+        # nada que llenar.
+        cr = self.env.cr
+        if not column_exists(cr, self._table, 'es_salida_acopio'):
+            create_column(cr, self._table, 'es_salida_acopio', 'boolean')
+            if column_exists(cr, self._table, 'salida_acopio_id'):
+                cr.execute(f"""
+                    UPDATE {self._table}
+                       SET es_salida_acopio = TRUE
+                     WHERE salida_acopio_id IS NOT NULL
+                """)
+        return super()._auto_init()
+
+    @api.depends('salida_acopio_id')
     def _compute_es_salida_acopio(self):
         for record in self:
             record.es_salida_acopio = bool(record.salida_acopio_id)
 
 
 class StockMove(models.Model):
-    _inherit = 'stock.move'
+    _name = 'stock.move'
+    _inherit = ['stock.move', 'salida.acopio.cretib.mixin']
 
     salida_acopio_linea_id = fields.Many2one(
         'salida.acopio.linea',
         string='Línea Salida Acopio',
         ondelete='set null',
+        index='btree_not_null',
     )
 
-    clasificacion_corrosivo = fields.Boolean(string='Corrosivo (C)')
-    clasificacion_reactivo = fields.Boolean(string='Reactivo (R)')
-    clasificacion_explosivo = fields.Boolean(string='Explosivo (E)')
-    clasificacion_toxico = fields.Boolean(string='Tóxico (T)')
-    clasificacion_inflamable = fields.Boolean(string='Inflamable (I)')
-    clasificacion_biologico = fields.Boolean(string='Biológico (B)')
-
     cretib_summary = fields.Char(
         string='CRETIB',
         compute='_compute_cretib_summary',
@@ -82,17 +101,13 @@ class StockMove(models.Model):
 
     numero_placa = fields.Char(string='Número de Placa')
 
-    @api.depends(
-        'clasificacion_corrosivo', 'clasificacion_reactivo', 'clasificacion_explosivo',
-        'clasificacion_toxico', 'clasificacion_inflamable', 'clasificacion_biologico'
-    )
+    @api.model
+    def _prepare_merge_moves_distinct_fields(self):
+        # Un move por línea de salida: evita que action_confirm fusione moves
+        # del mismo producto y pierda la relación con su línea.
+        return super()._prepare_merge_moves_distinct_fields() + ['salida_acopio_linea_id']
+
+    @api.depends('cretib_mask')
     def _compute_cretib_summary(self):
         for move in self:
-            tags = []
-            if move.clasificacion_corrosivo: tags.append('C')
-            if move.clasificacion_reactivo: tags.append('R')
-            if move.clasificacion_explosivo: tags.append('E')
-            if move.clasificacion_toxico: tags.append('T')
-            if move.clasificacion_inflamable: tags.append('I')
-            if move.clasificacion_biologico: tags.append('B')
-            move.cretib_summary = ', '.join(tags)
\ No newline at end of file
+            move.cretib_summary = _cretib_letters(move.cretib_mask)
\ No newline at end of file
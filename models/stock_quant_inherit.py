@@ -0,0 +1,24 @@
+# -*- coding: utf-8 -*-
+from odoo import models, api
+
+from .salida_acopio import _invalidate_acopio_quant_snapshot
+
+
+class StockQuant(models.Model):
+    _inherit = 'stock.quant'
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        records = super().create(vals_list)
+        _invalidate_acopio_quant_snapshot(self.env)
+        return records
+
+    def write(self, vals):
+        res = super().write(vals)
+        _invalidate_acopio_quant_snapshot(self.env)
+        return res
+
+    def unlink(self):
+        res = super().unlink()
+        _invalidate_acopio_quant_snapshot(self.env)
+        return res
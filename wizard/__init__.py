@@ -1,2 +1,4 @@
 # -*- coding: utf-8 -*-
-from . import salida_acopio_wizard
\ No newline at end of file
+from . import salida_acopio_wizard
+from . import salida_acopio_import
+from . import salida_acopio_print_batch
\ No newline at end of file
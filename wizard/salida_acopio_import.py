@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+from odoo.exceptions import UserError
+import base64
+import csv
+import io
+import logging
+
+from ..models.salida_acopio import _get_acopio_quant_snapshot, _merge_loaded_vals
+
+_logger = logging.getLogger(__name__)
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+
+class SalidaAcopioImport(models.TransientModel):
+    _name = 'salida.acopio.import'
+    _description = 'Importación de Salidas de Acopio'
+
+    archivo = fields.Binary(string='Archivo (CSV / XLSX)', required=True)
+    nombre_archivo = fields.Char(string='Nombre del Archivo')
+    tamano_bloque = fields.Integer(
+        string='Líneas por Bloque', default=500,
+        help='Número de líneas que se acumulan por salida antes de crearlas en la base de datos.',
+    )
+
+    state = fields.Selection([
+        ('draft', 'Borrador'),
+        ('done', 'Importado'),
+    ], default='draft')
+
+    salida_ids = fields.Many2many('salida.acopio', string='Salidas Creadas', readonly=True)
+    filas_leidas = fields.Integer(string='Filas Leídas', readonly=True)
+    lineas_creadas = fields.Integer(string='Líneas Creadas', readonly=True)
+    filas_con_error = fields.Integer(string='Filas con Error', readonly=True)
+    reporte_errores = fields.Binary(string='Reporte de Errores', readonly=True)
+    nombre_reporte = fields.Char(default='errores_importacion.csv')
+
+    # -------------------------------------------------------------------------
+    # Lectura del archivo
+    # -------------------------------------------------------------------------
+
+    def _open_archivo(self):
+        """Abre el archivo desde el filestore sin cargarlo completo en memoria."""
+        attachment = self.env['ir.attachment'].sudo().search([
+            ('res_model', '=', self._name),
+            ('res_id', '=', self.id),
+            ('res_field', '=', 'archivo'),
+        ], limit=1)
+        if attachment.store_fname:
+            return open(attachment._full_path(attachment.store_fname), 'rb')
+        return io.BytesIO(base64.b64decode(self.with_context(bin_size=False).archivo))
+
+    def _iter_filas(self, stream):
+        """Genera ``(numero_fila, dict)`` fila por fila para CSV o XLSX."""
+        nombre = (self.nombre_archivo or '').lower()
+        if nombre.endswith('.xlsx'):
+            if openpyxl is None:
+                raise UserError("Se requiere la librería openpyxl para importar archivos XLSX.")
+            workbook = openpyxl.load_workbook(stream, read_only=True, data_only=True)
+            try:
+                rows = workbook.active.iter_rows(values_only=True)
+                header = [str(c or '').strip().lower() for c in next(rows, ())]
+                for numero, row in enumerate(rows, start=2):
+                    yield numero, {
+                        h: ('' if v is None else str(v).strip()) for h, v in zip(header, row) if h
+                    }
+            finally:
+                workbook.close()
+        else:
+            text = io.TextIOWrapper(stream, encoding='utf-8-sig', newline='')
+            reader = csv.DictReader(text)
+            reader.fieldnames = [(f or '').strip().lower() for f in reader.fieldnames or []]
+            for numero, row in enumerate(reader, start=2):
+                yield numero, {k: (v or '').strip() for k, v in row.items() if k}
+
+    # -------------------------------------------------------------------------
+    # Índices en memoria
+    # -------------------------------------------------------------------------
+
+    def _build_lot_index(self):
+        """Índice nombre de lote → datos, construido una vez a partir del stock en acopio."""
+        location_acopio = self.env.company._get_salida_acopio_config()['location_acopio']
+        if not location_acopio:
+            raise UserError("No se encontró una ubicación de tipo interno que contenga 'Acopio' en su nombre.")
+        snapshot = _get_acopio_quant_snapshot(self.env, location_acopio)
+        lot_ids = [lot_id for (product_id, lot_id) in snapshot['by_lot']]
+        reservados = self.env['salida.acopio.linea']._get_salidas_by_lot(lot_ids)
+        index = {}
+        for lot in self.env['stock.lot'].search_read([('id', 'in', lot_ids)], ['name', 'product_id']):
+            product_id = lot['product_id'][0]
+            index.setdefault(lot['name'], []).append({
+                'lot_id': lot['id'],
+                'product_id': product_id,
+                'disponible': snapshot['by_lot'].get((product_id, lot['id']), 0.0),
+                'reservado': reservados.get(lot['id'], self.env['salida.acopio']).numero_referencia or False,
+            })
+        return snapshot, index
+
+    def _build_product_index(self, snapshot):
+        index = {}
+        products = self.env['product.product'].search_read(
+            [('id', 'in', list(snapshot['by_product']))], ['name', 'default_code'],
+        )
+        for product in products:
+            index[product['name'].lower()] = product['id']
+            if product['default_code']:
+                index[product['default_code'].lower()] = product['id']
+        return index
+
+    def _resolve_partner(self, cache, nombre):
+        if not nombre:
+            return False
+        if nombre not in cache:
+            partner = self.env['res.partner'].search([('name', '=ilike', nombre)], limit=1)
+            cache[nombre] = partner.id or False
+        return cache[nombre]
+
+    def _resolve_vehicle(self, cache, placa):
+        if not placa:
+            return False
+        if placa not in cache:
+            vehicle = self.env['fleet.vehicle'].search([('license_plate', '=ilike', placa)], limit=1)
+            cache[placa] = vehicle.id or False
+        return cache[placa]
+
+    # -------------------------------------------------------------------------
+    # Importación
+    # -------------------------------------------------------------------------
+
+    def action_importar(self):
+        self.ensure_one()
+        snapshot, lot_index = self._build_lot_index()
+        product_index = self._build_product_index(snapshot)
+        partners, vehicles = {}, {}
+        tamano_bloque = max(self.tamano_bloque, 1)
+
+        grupos = {}
+        lotes_vistos = set()
+        # kg ya asignados por producto en el archivo (con y sin lote)
+        consumido = {}
+        errores = []
+        filas_leidas = lineas_creadas = 0
+        Salida = self.env['salida.acopio']
+        Linea = self.env['salida.acopio.linea']
+
+        def registrar(vals, signo):
+            # Lotes y kg tomados por las filas en buffer o ya creadas; una fila
+            # que falla al crearse los devuelve para no rechazar filas posteriores.
+            if vals.get('lote_id'):
+                if signo > 0:
+                    lotes_vistos.add(vals['lote_id'])
+                else:
+                    lotes_vistos.discard(vals['lote_id'])
+            producto_id = vals['producto_id']
+            consumido[producto_id] = consumido.get(producto_id, 0.0) + signo * vals['cantidad']
+
+        def flush(grupo):
+            nonlocal lineas_creadas
+            if not grupo['lineas']:
+                return
+            try:
+                with self.env.cr.savepoint():
+                    Linea.create(self._completar_lineas([vals for numero, vals in grupo['lineas']]))
+                lineas_creadas += len(grupo['lineas'])
+            except Exception:
+                # Reintento fila por fila para reportar solo las que fallan
+                for numero, vals in grupo['lineas']:
+                    try:
+                        with self.env.cr.savepoint():
+                            Linea.create(self._completar_lineas([vals]))
+                        lineas_creadas += 1
+                    except Exception as e:
+                        registrar(vals, -1)
+                        errores.append((numero, str(e)))
+            grupo['lineas'] = []
+
+        with self._open_archivo() as stream:
+            for numero, fila in self._iter_filas(stream):
+                filas_leidas += 1
+                try:
+                    linea_vals = self._prepare_linea_vals(
+                        fila, lot_index, product_index, snapshot, lotes_vistos, consumido,
+                    )
+                    transportista_id = self._resolve_partner(partners, fila.get('transportista'))
+                    destinatario_id = self._resolve_partner(partners, fila.get('destinatario'))
+                    if not transportista_id or not destinatario_id:
+                        raise UserError("Transportista o destinatario no encontrado.")
+                except UserError as e:
+                    errores.append((numero, str(e)))
+                    continue
+
+                clave = (transportista_id, destinatario_id, fila.get('placa') or '')
+                grupo = grupos.get(clave)
+                if grupo is None:
+                    try:
+                        with self.env.cr.savepoint():
+                            salida = Salida.create({
+                                'transportista_id': transportista_id,
+                                'destinatario_id': destinatario_id,
+                                'chofer_id': self._resolve_partner(partners, fila.get('chofer')),
+                                'vehicle_id': self._resolve_vehicle(vehicles, fila.get('placa')),
+                                'numero_placa': fila.get('placa') or False,
+                                'observaciones': fila.get('observaciones') or False,
+                            })
+                    except Exception as e:
+                        errores.append((numero, str(e)))
+                        continue
+                    grupo = grupos[clave] = {'salida': salida, 'lineas': []}
+                registrar(linea_vals, 1)
+                grupo['lineas'].append((numero, {'salida_id': grupo['salida'].id, **linea_vals}))
+                if len(grupo['lineas']) >= tamano_bloque:
+                    flush(grupo)
+
+        for grupo in grupos.values():
+            flush(grupo)
+
+        salidas = Salida.browse([g['salida'].id for g in grupos.values()])
+        vacias = salidas.filtered(lambda s: not s.linea_ids)
+        vacias.unlink()
+        salidas -= vacias
+
+        _logger.info(
+            f"[ACOPIO] Importación {self.nombre_archivo}: {filas_leidas} filas, "
+            f"{lineas_creadas} líneas, {len(salidas)} salidas, {len(errores)} errores"
+        )
+        self.write({
+            'state': 'done',
+            'salida_ids': [(6, 0, salidas.ids)],
+            'filas_leidas': filas_leidas,
+            'lineas_creadas': lineas_creadas,
+            'filas_con_error': len(errores),
+            'reporte_errores': self._build_reporte_errores(errores),
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'view_mode': 'form',
+            'res_id': self.id,
+            'target': 'new',
+        }
+
+    def _completar_lineas(self, vals_list):
+        """Completa CRETIB, tipo de residuo, envase, plan de manejo y nombre
+        de un bloque de líneas con las lecturas por lotes del modelo de línea,
+        igual que los onchange de producto y lote."""
+        Linea = self.env['salida.acopio.linea']
+        con_lote = [vals for vals in vals_list if vals.get('lote_id')]
+        if con_lote:
+            lots = self.env['stock.lot'].browse([vals['lote_id'] for vals in con_lote])
+            completos = Linea._prepare_vals_from_lots([
+                (lot, vals['cantidad']) for lot, vals in zip(lots, con_lote)
+            ])
+            for vals, completo in zip(con_lote, completos):
+                for field, value in completo.items():
+                    vals.setdefault(field, value)
+        sin_lote = [vals for vals in vals_list if not vals.get('lote_id')]
+        if sin_lote:
+            products = self.env['product.product'].browse({vals['producto_id'] for vals in sin_lote})
+            product_data = Linea._get_product_data(products)
+            for vals in sin_lote:
+                _merge_loaded_vals(vals, product_data[vals['producto_id']])
+        return vals_list
+
+    def _prepare_linea_vals(self, fila, lot_index, product_index, snapshot, lotes_vistos, consumido):
+        try:
+            cantidad = float((fila.get('cantidad') or '0').replace(',', '.'))
+        except ValueError:
+            raise UserError(f"Cantidad inválida: {fila.get('cantidad')}")
+        if cantidad <= 0:
+            raise UserError("La cantidad debe ser mayor a cero.")
+
+        producto = (fila.get('producto') or '').lower()
+        product_id = product_index.get(producto) if producto else False
+        if producto and not product_id:
+            raise UserError(f"Producto '{fila.get('producto')}' sin stock en acopio.")
+
+        lote = fila.get('lote')
+        if not lote:
+            if not product_id:
+                raise UserError("La fila no tiene producto ni lote.")
+            disponible = snapshot['by_product'].get(product_id, 0.0) - consumido.get(product_id, 0.0)
+            if cantidad > disponible:
+                raise UserError(f"Stock insuficiente: solicitado {cantidad} kg, disponible {disponible} kg.")
+            return {'producto_id': product_id, 'cantidad': cantidad}
+
+        candidatos = [
+            c for c in lot_index.get(lote, [])
+            if not product_id or c['product_id'] == product_id
+        ]
+        if not candidatos:
+            raise UserError(f"Lote '{lote}' sin stock en acopio.")
+        if len(candidatos) > 1:
+            raise UserError(f"El lote '{lote}' existe para varios productos; indique el producto.")
+        datos = candidatos[0]
+        if datos['reservado']:
+            raise UserError(f"El lote '{lote}' ya está en la salida '{datos['reservado']}'.")
+        if datos['lot_id'] in lotes_vistos:
+            raise UserError(f"El lote '{lote}' está repetido en el archivo.")
+        if cantidad > datos['disponible']:
+            raise UserError(
+                f"Stock insuficiente en el lote '{lote}': solicitado {cantidad} kg, "
+                f"disponible {datos['disponible']} kg."
+            )
+        return {
+            'producto_id': datos['product_id'],
+            'lote_id': datos['lot_id'],
+            'cantidad': cantidad,
+        }
+
+    def _build_reporte_errores(self, errores):
+        if not errores:
+            return False
+        output = io.StringIO()
+        writer = csv.writer(output)
+        writer.writerow(['fila', 'error'])
+        writer.writerows(errores)
+        return base64.b64encode(output.getvalue().encode('utf-8'))
+
+    def action_ver_salidas(self):
+        self.ensure_one()
+        return {
+            'name': 'Salidas Importadas',
+            'type': 'ir.actions.act_window',
+            'res_model': 'salida.acopio',
+            'view_mode': 'list,form',
+            'domain': [('id', 'in', self.salida_ids.ids)],
+            'target': 'current',
+        }
@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+from odoo import models, fields
+from odoo.exceptions import UserError
+from odoo.tools import config, split_every
+from odoo.tools.pdf import merge_pdf
+from concurrent.futures import ThreadPoolExecutor
+import base64
+import io
+import logging
+import time
+import zipfile
+
+_logger = logging.getLogger(__name__)
+
+REPORT_XMLID = 'salida_acopio_manifiesto.action_report_manifiesto_salida'
+# Cada hilo abre un cursor propio del pool (``db_maxconn``), compartido con
+# las peticiones HTTP y los crons del worker.
+MAX_WORKERS = 4
+
+
+class SalidaAcopioPrintBatch(models.TransientModel):
+    _name = 'salida.acopio.print.batch'
+    _description = 'Impresión por Lotes de Manifiestos de Salida'
+
+    salida_ids = fields.Many2many('salida.acopio', string='Salidas', required=True)
+    formato = fields.Selection([
+        ('pdf', 'Un solo PDF'),
+        ('zip', 'ZIP (un PDF por manifiesto)'),
+    ], string='Formato', default='pdf', required=True)
+    tamano_bloque = fields.Integer(
+        string='Manifiestos por Bloque', default=20,
+        help='Número de manifiestos que se envían juntos a wkhtmltopdf.',
+    )
+    max_workers = fields.Integer(
+        string='Renderizados en Paralelo', default=4,
+        help='Número máximo de bloques que se renderizan al mismo tiempo '
+             f'(a lo más {MAX_WORKERS}).',
+    )
+
+    state = fields.Selection([
+        ('draft', 'Borrador'),
+        ('done', 'Generado'),
+    ], default='draft')
+
+    archivo = fields.Binary(string='Archivo', readonly=True)
+    nombre_archivo = fields.Char(string='Nombre del Archivo')
+    documentos_ok = fields.Integer(string='Manifiestos Generados', readonly=True)
+    documentos_error = fields.Integer(string='Manifiestos con Error', readonly=True)
+    duracion = fields.Float(string='Duración (s)', readonly=True, digits=(16, 2))
+    throughput = fields.Float(string='Manifiestos por Segundo', readonly=True, digits=(16, 2))
+    detalle_errores = fields.Text(string='Errores', readonly=True)
+
+    # -------------------------------------------------------------------------
+    # Renderizado
+    # -------------------------------------------------------------------------
+
+    def _render_bloque(self, manifiesto_ids):
+        """Renderiza un bloque en su propio cursor: ``({res_id: pdf}, {res_id: error})``.
+
+        Cada hilo abre su cursor porque los cursores no se comparten entre
+        hilos. Si el bloque falla se reintenta manifiesto por manifiesto para
+        aislar los documentos con error.
+        """
+        with self.env.registry.cursor() as cr:
+            env = self.env(cr=cr)
+            report = env.ref(REPORT_XMLID)
+            try:
+                streams = report._render_qweb_pdf_prepare_streams(report.report_name, None, res_ids=manifiesto_ids)
+                return {res_id: s['stream'].getvalue() for res_id, s in streams.items()}, {}
+            except Exception as e:
+                if len(manifiesto_ids) == 1:
+                    return {}, {manifiesto_ids[0]: str(e)}
+                _logger.warning(f"Bloque de {len(manifiesto_ids)} manifiestos falló, reintentando uno por uno: {e}")
+                cr.rollback()
+            pdfs, errores = {}, {}
+            for res_id in manifiesto_ids:
+                try:
+                    streams = report._render_qweb_pdf_prepare_streams(report.report_name, None, res_ids=[res_id])
+                    pdfs[res_id] = b''.join(s['stream'].getvalue() for s in streams.values())
+                except Exception as e:
+                    cr.rollback()
+                    errores[res_id] = str(e)
+            return pdfs, errores
+
+    def _get_max_workers(self, bloques):
+        """Hilos a usar: lo pedido, acotado por ``MAX_WORKERS``, por una
+        cuarta parte de ``db_maxconn`` y por el número de bloques."""
+        limite = min(MAX_WORKERS, max(1, config['db_maxconn'] // 4))
+        return max(1, min(self.max_workers, limite, bloques))
+
+    def action_imprimir(self):
+        self.ensure_one()
+        salidas = self.salida_ids.filtered('manifiesto_salida_id')
+        if not salidas:
+            raise UserError("Ninguna de las salidas seleccionadas tiene manifiesto de salida.")
+        manifiestos = salidas.manifiesto_salida_id
+        # Los hilos usan su propio cursor y solo ven datos ya confirmados en la
+        # base; los manifiestos a imprimir existen desde que se confirmó la salida.
+
+        inicio = time.monotonic()
+        bloques = list(split_every(max(self.tamano_bloque, 1), manifiestos.ids, list))
+        pdfs, errores = {}, {}
+        with ThreadPoolExecutor(max_workers=self._get_max_workers(len(bloques))) as executor:
+            for bloque_pdfs, bloque_errores in executor.map(self._render_bloque, bloques):
+                pdfs.update(bloque_pdfs)
+                errores.update(bloque_errores)
+        duracion = time.monotonic() - inicio
+
+        if not pdfs:
+            raise UserError(
+                "❌ No se pudo generar ningún manifiesto:\n\n"
+                + "\n".join(f"• {m.numero_manifiesto or m.id}: {errores.get(m.id, '')}" for m in manifiestos)
+            )
+
+        # Un bloque que no se pudo separar por documento llega con clave False
+        orden = [m for m in manifiestos if m.id in pdfs]
+        sueltos = [pdf for res_id, pdf in pdfs.items() if not res_id]
+        if self.formato == 'zip':
+            buffer = io.BytesIO()
+            with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+                for m in orden:
+                    zf.writestr(f"{m.numero_manifiesto or m.id}.pdf", pdfs[m.id])
+                for i, pdf in enumerate(sueltos, start=1):
+                    zf.writestr(f"bloque_{i}.pdf", pdf)
+            contenido, nombre = buffer.getvalue(), 'manifiestos_salida.zip'
+        else:
+            contenido = merge_pdf([pdfs[m.id] for m in orden] + sueltos)
+            nombre = 'manifiestos_salida.pdf'
+
+        _logger.info(
+            f"Impresión por lotes: {len(pdfs)} manifiestos en {duracion:.2f}s "
+            f"({len(bloques)} bloques), {len(errores)} con error"
+        )
+        self.write({
+            'state': 'done',
+            'archivo': base64.b64encode(contenido),
+            'nombre_archivo': nombre,
+            'documentos_ok': len(manifiestos) - len(errores),
+            'documentos_error': len(errores),
+            'duracion': duracion,
+            'throughput': (len(manifiestos) - len(errores)) / duracion if duracion else 0.0,
+            'detalle_errores': "\n".join(
+                f"• {m.numero_manifiesto or m.id}: {errores[m.id]}" for m in manifiestos if m.id in errores
+            ) or False,
+        })
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
@@ -1,21 +1,18 @@
 # -*- coding: utf-8 -*-
-from odoo import models, fields, api
+from odoo import models, fields, api, Command
 from odoo.exceptions import UserError, ValidationError
 import logging
+import re
 
-_logger = logging.getLogger(__name__)
-
+from ..models.salida_acopio import (
+    LOT_CONFLICT_ESTADOS,
+    _cretib_letters,
+    _get_acopio_quant_snapshot,
+    _merge_loaded_vals,
+)
+from ..models.salida_acopio_job import ASYNC_THRESHOLD_PARAM
 
-def _find_location_acopio(env, company_id=None):
-    domain = [
-        ('complete_name', 'ilike', 'Acopio'),
-        ('usage', '=', 'internal'),
-    ]
-    if company_id:
-        loc = env['stock.location'].search(domain + [('company_id', '=', company_id)], limit=1)
-        if loc:
-            return loc
-    return env['stock.location'].search(domain, limit=1)
+_logger = logging.getLogger(__name__)
 
 
 ENVASE_TIPO_SELECTION = [
@@ -82,6 +79,19 @@ class SalidaAcopioWizard(models.TransientModel):
 
     observaciones = fields.Text(string='Observaciones')
 
+    modo_escaneo = fields.Boolean(string='Modo Escaneo')
+    codigo_escaneo = fields.Char(
+        string='Escanear Lote',
+        help='Escanee uno o varios códigos de lote; cada lote se agrega como una línea completa.',
+    )
+
+    filtro_producto_ids = fields.Many2many(
+        'product.product', string='Filtrar Productos',
+        help='Al cargar todo el stock de acopio, solo incluir estos productos.',
+    )
+    filtro_residue_type = fields.Selection(RESIDUE_TYPE_SELECTION, string='Filtrar Tipo de Residuo')
+    filtro_tipo_manejo_id = fields.Many2one('residuo.tipo.manejo', string='Filtrar Plan de Manejo')
+
     def _get_sai_partner(self):
         sai_partner = self.env['res.partner'].search([
             ('is_company', '=', True), ('name', 'ilike', 'SAI')
@@ -111,6 +121,113 @@ class SalidaAcopioWizard(models.TransientModel):
             else:
                 rec.numero_placa = False
 
+    @api.onchange('codigo_escaneo')
+    def _onchange_codigo_escaneo(self):
+        codigos = [c for c in re.split(r'[\s,;]+', self.codigo_escaneo or '') if c]
+        if not codigos:
+            return
+        self.codigo_escaneo = False
+        vals_list, errores = self._resolve_scanned_lots(codigos)
+        if vals_list:
+            self.linea_ids = [Command.create(vals) for vals in vals_list]
+        if errores:
+            return {
+                'warning': {
+                    'title': '⚠️ Códigos no agregados',
+                    'message': "\n".join(errores),
+                }
+            }
+
+    def _resolve_scanned_lots(self, codigos):
+        """Resuelve códigos de lote escaneados a valores de línea completos.
+
+        Lotes, existencias en acopio y reservas se consultan una vez para
+        todos los códigos, por nombre y por id indexados.
+        """
+        location_acopio = self.env.company._get_salida_acopio_config()['location_acopio']
+        if not location_acopio:
+            return [], ["No se encontró una ubicación de tipo interno que contenga 'Acopio' en su nombre."]
+        Linea = self.env['salida.acopio.linea']
+        lots = self.env['stock.lot'].search([
+            ('name', 'in', codigos),
+            ('company_id', 'in', [False, self.env.company.id]),
+        ])
+        disponible = {
+            lot.id: cantidad
+            for lot, cantidad in self.env['stock.quant']._read_group(
+                [('location_id', '=', location_acopio.id), ('lot_id', 'in', lots.ids), ('quantity', '>', 0)],
+                ['lot_id'], ['quantity:sum'],
+            )
+        }
+        reservados = Linea._get_salidas_by_lot(list(disponible))
+        en_wizard = set(self.linea_ids.lote_id.ids)
+
+        lots_by_name = {}
+        for lot in lots:
+            if lot.id in disponible:
+                lots_by_name.setdefault(lot.name, []).append(lot)
+
+        lot_quantities, errores = [], []
+        for codigo in dict.fromkeys(codigos):
+            candidatos = lots_by_name.get(codigo, [])
+            if not candidatos:
+                errores.append(f"• {codigo}: lote sin stock en acopio")
+            elif len(candidatos) > 1:
+                errores.append(f"• {codigo}: el lote existe para varios productos, selecciónelo manualmente")
+            elif candidatos[0].id in en_wizard:
+                errores.append(f"• {codigo}: ya está en esta salida")
+            elif candidatos[0].id in reservados:
+                otra = reservados[candidatos[0].id][:1]
+                estado = LOT_CONFLICT_ESTADOS.get(otra.state, 'reservado en borrador en')
+                errores.append(f"• {codigo}: {estado} la salida {otra.numero_referencia}")
+            else:
+                lot_quantities.append((candidatos[0], disponible[candidatos[0].id]))
+        return Linea._prepare_vals_from_lots(lot_quantities), errores
+
+    def action_cargar_todo_disponible(self):
+        """Agrega una línea por cada lote con stock en acopio no reservado.
+
+        Las existencias salen de la instantánea de quants, las reservas de
+        una sola consulta y los datos de producto/lote de las lecturas por
+        lotes de ``_prepare_vals_from_lots``; las líneas se crean en un solo
+        ``create``.
+        """
+        self.ensure_one()
+        location_acopio = self.env.company._get_salida_acopio_config()['location_acopio']
+        if not location_acopio:
+            raise UserError("No se encontró una ubicación de tipo interno que contenga 'Acopio' en su nombre.")
+        Linea = self.env['salida.acopio.linea']
+        snapshot = _get_acopio_quant_snapshot(self.env, location_acopio)
+        productos = set(self.filtro_producto_ids.ids)
+        candidatos = {
+            lot_id: cantidad
+            for (product_id, lot_id), cantidad in snapshot['by_lot'].items()
+            if cantidad > 0 and (not productos or product_id in productos)
+        }
+        reservados = Linea._get_salidas_by_lot(list(candidatos))
+        en_wizard = set(self.linea_ids.lote_id.ids)
+        lots = self.env['stock.lot'].browse([
+            lot_id for lot_id in candidatos
+            if lot_id not in reservados and lot_id not in en_wizard
+        ])
+        vals_list = [
+            dict(vals, wizard_id=self.id)
+            for vals in Linea._prepare_vals_from_lots([(lot, candidatos[lot.id]) for lot in lots])
+            if (not self.filtro_residue_type or vals.get('residue_type') == self.filtro_residue_type)
+            and (not self.filtro_tipo_manejo_id or vals.get('tipo_manejo_id') == self.filtro_tipo_manejo_id.id)
+        ]
+        if not vals_list:
+            raise UserError("No hay lotes disponibles en acopio que cumplan los filtros.")
+        self.env['salida.acopio.wizard.linea'].create(vals_list)
+        _logger.info(f"Carga completa de acopio: {len(vals_list)} lotes agregados al wizard {self.id}")
+        return {
+            'type': 'ir.actions.act_window',
+            'res_model': self._name,
+            'res_id': self.id,
+            'view_mode': 'form',
+            'target': 'new',
+        }
+
     def _validate_no_duplicates(self):
         seen = {}
         for linea in self.linea_ids:
@@ -128,21 +245,16 @@ class SalidaAcopioWizard(models.TransientModel):
             seen[key] = True
 
     def _validate_lotes_no_usados(self):
-        for linea in self.linea_ids:
-            if not linea.lote_id:
-                continue
-            otras = self.env['salida.acopio.linea'].search([
-                ('lote_id', '=', linea.lote_id.id),
-                ('salida_id.state', 'in', ('draft', 'done')),
-            ], limit=1)
-            if otras:
-                estado = 'ya entregado en' if otras.salida_id.state == 'done' else 'reservado en borrador en'
-                raise UserError(
-                    f"⚠️ Lote no disponible:\n\n"
-                    f"El lote '{linea.lote_id.name}' del producto "
-                    f"'{linea.producto_id.name}' está {estado} la salida "
-                    f"'{otras.salida_id.numero_referencia}'."
-                )
+        lineas = self.linea_ids.filtered('lote_id')
+        Linea = self.env['salida.acopio.linea']
+        salidas_by_lot = Linea._get_salidas_by_lot(lineas.lote_id.ids)
+        conflictos = [
+            (linea.lote_id, otra)
+            for linea in lineas
+            for otra in salidas_by_lot.get(linea.lote_id.id, [])
+        ]
+        if conflictos:
+            raise UserError(Linea._format_lot_conflicts(conflictos))
 
     def action_confirmar_salida(self):
         self.ensure_one()
@@ -175,12 +287,7 @@ class SalidaAcopioWizard(models.TransientModel):
                 'cantidad': linea.cantidad,
                 'nombre_residuo': linea.nombre_residuo or '',
                 'residue_type': linea.residue_type or False,
-                'clasificacion_corrosivo': linea.clasificacion_corrosivo,
-                'clasificacion_reactivo': linea.clasificacion_reactivo,
-                'clasificacion_explosivo': linea.clasificacion_explosivo,
-                'clasificacion_toxico': linea.clasificacion_toxico,
-                'clasificacion_inflamable': linea.clasificacion_inflamable,
-                'clasificacion_biologico': linea.clasificacion_biologico,
+                'cretib_mask': linea.cretib_mask,
                 'envase_tipo': linea.envase_tipo or False,
                 'packaging_id': linea.packaging_id.id if linea.packaging_id else False,
                 'envase_cantidad': linea.envase_cantidad or 1,
@@ -202,10 +309,15 @@ class SalidaAcopioWizard(models.TransientModel):
             salida = self.env['salida.acopio'].create(salida_vals)
             _logger.info(f"Creada salida de acopio: {salida.numero_referencia}")
 
-            for linea_data in lineas_data:
-                self.env['salida.acopio.linea'].create({'salida_id': salida.id, **linea_data})
+            self.env['salida.acopio.linea'].create([
+                {'salida_id': salida.id, **linea_data} for linea_data in lineas_data
+            ])
 
-            salida.action_confirmar_salida()
+            umbral = int(self.env['ir.config_parameter'].sudo().get_param(ASYNC_THRESHOLD_PARAM, 0) or 0)
+            if umbral and len(lineas_data) >= umbral:
+                salida.action_encolar_confirmacion()
+            else:
+                salida.action_confirmar_salida()
 
             return {
                 'name': 'Salida de Acopio Realizada',
@@ -222,6 +334,7 @@ class SalidaAcopioWizard(models.TransientModel):
 
 class SalidaAcopioWizardLinea(models.TransientModel):
     _name = 'salida.acopio.wizard.linea'
+    _inherit = ['salida.acopio.cretib.mixin']
     _description = 'Línea del Wizard de Salida de Acopio'
 
     wizard_id = fields.Many2one(
@@ -255,13 +368,6 @@ class SalidaAcopioWizardLinea(models.TransientModel):
     nombre_residuo = fields.Char(string='Nombre del Residuo')
     residue_type = fields.Selection(RESIDUE_TYPE_SELECTION, string='Tipo de Residuo')
 
-    clasificacion_corrosivo = fields.Boolean(string='Corrosivo (C)')
-    clasificacion_reactivo = fields.Boolean(string='Reactivo (R)')
-    clasificacion_explosivo = fields.Boolean(string='Explosivo (E)')
-    clasificacion_toxico = fields.Boolean(string='Tóxico (T)')
-    clasificacion_inflamable = fields.Boolean(string='Inflamable (I)')
-    clasificacion_biologico = fields.Boolean(string='Biológico (B)')
-
     clasificaciones_cretib = fields.Char(string='CRETIB', compute='_compute_clasificaciones_cretib')
 
     envase_tipo = fields.Selection(ENVASE_TIPO_SELECTION, string='Tipo de Envase (Legacy)')
@@ -275,144 +381,98 @@ class SalidaAcopioWizardLinea(models.TransientModel):
     etiqueta_no = fields.Boolean(string='Etiqueta - No', default=False)
 
     def _get_location_acopio(self):
-        return _find_location_acopio(self.env, self.env.company.id)
+        return self.env.company._get_salida_acopio_config()['location_acopio']
+
+    def _get_acopio_quant_snapshot(self):
+        location_acopio = self._get_location_acopio()
+        if not location_acopio:
+            return None
+        return _get_acopio_quant_snapshot(self.env, location_acopio)
 
     def _get_lots_with_stock_in_acopio(self):
         if not self.producto_id:
             return self.env['stock.lot']
-        location_acopio = self._get_location_acopio()
-        if not location_acopio:
+        snapshot = self._get_acopio_quant_snapshot()
+        if not snapshot:
             return self.env['stock.lot']
-        quants = self.env['stock.quant'].search([
-            ('product_id', '=', self.producto_id.id),
-            ('location_id', '=', location_acopio.id),
-            ('quantity', '>', 0),
-        ])
-        return quants.mapped('lot_id')
+        return self.env['stock.lot'].browse(
+            snapshot['lots_by_product'].get(self.producto_id.id, [])
+        )
 
     @api.depends('wizard_id')
     def _compute_available_product_ids(self):
-        location_acopio = None
+        snapshot = self._get_acopio_quant_snapshot()
+        stock_product_ids = list(snapshot['by_product']) if snapshot else []
         for record in self:
-            if not location_acopio:
-                location_acopio = record._get_location_acopio()
-            if not location_acopio:
+            if snapshot is None:
                 record.available_product_ids = [(5, 0, 0)]
                 continue
-            quants = record.env['stock.quant'].search([
-                ('location_id', '=', location_acopio.id),
-                ('quantity', '>', 0),
-            ])
-            product_ids = quants.mapped('product_id').ids
-            if record.producto_id and record.producto_id.id not in product_ids:
+            product_ids = stock_product_ids
+            if record.producto_id and record.producto_id.id not in snapshot['by_product']:
                 product_ids = product_ids + [record.producto_id.id]
             record.available_product_ids = [(6, 0, product_ids)]
 
     @api.depends('producto_id', 'wizard_id.linea_ids.lote_id', 'wizard_id.linea_ids.producto_id')
     def _compute_available_lot_ids(self):
+        snapshot = self._get_acopio_quant_snapshot()
+        # Lotes usados por cada wizard, calculados una vez y no por línea; el
+        # lote propio de la línea se vuelve a agregar más abajo.
+        used_by_wizard = {
+            parent: set(parent.linea_ids.lote_id.ids) for parent in self.wizard_id
+        }
+        candidates = {}
+        for record in self:
+            if not record.producto_id or not snapshot:
+                continue
+            used_in_same_wizard = used_by_wizard.get(record.wizard_id, ())
+            candidates[record] = {
+                lot_id for lot_id in snapshot['lots_by_product'].get(record.producto_id.id, [])
+                if lot_id not in used_in_same_wizard
+            }
+        salidas_by_lot = self.env['salida.acopio.linea']._get_salidas_by_lot(
+            set().union(*candidates.values())
+        )
         for record in self:
             if not record.producto_id:
                 record.available_lot_ids = [(5, 0, 0)]
                 continue
-            stock_lots = record._get_lots_with_stock_in_acopio()
-            available_ids = set(stock_lots.ids)
-            if record.wizard_id:
-                used_in_same_wizard = record.wizard_id.linea_ids.filtered(
-                    lambda l: l.id != record.id and l.lote_id
-                ).mapped('lote_id').ids
-                available_ids -= set(used_in_same_wizard)
-            if available_ids:
-                ya_usados = record.env['salida.acopio.linea'].search([
-                    ('lote_id', 'in', list(available_ids)),
-                    ('salida_id.state', 'in', ('draft', 'done')),
-                ]).mapped('lote_id').ids
-                available_ids -= set(ya_usados)
+            available_ids = {
+                lot_id for lot_id in candidates.get(record, ())
+                if lot_id not in salidas_by_lot
+            }
             if record.lote_id:
                 available_ids.add(record.lote_id.id)
             record.available_lot_ids = [(6, 0, list(available_ids))]
 
     @api.depends('producto_id', 'lote_id')
     def _compute_stock_disponible(self):
+        snapshot = self._get_acopio_quant_snapshot()
         for record in self:
-            if not record.producto_id:
+            if not record.producto_id or not snapshot:
                 record.stock_disponible = 0.0
-                continue
-            location_acopio = record._get_location_acopio()
-            if not location_acopio:
-                record.stock_disponible = 0.0
-                continue
-            domain = [
-                ('product_id', '=', record.producto_id.id),
-                ('location_id', '=', location_acopio.id),
-                ('quantity', '>', 0),
-            ]
-            if record.lote_id:
-                domain.append(('lot_id', '=', record.lote_id.id))
-            quants = self.env['stock.quant'].search(domain)
-            record.stock_disponible = sum(quants.mapped('quantity'))
+            elif record.lote_id:
+                record.stock_disponible = snapshot['by_lot'].get(
+                    (record.producto_id.id, record.lote_id.id), 0.0
+                )
+            else:
+                record.stock_disponible = snapshot['by_product'].get(record.producto_id.id, 0.0)
 
-    @api.depends(
-        'clasificacion_corrosivo', 'clasificacion_reactivo', 'clasificacion_explosivo',
-        'clasificacion_toxico', 'clasificacion_inflamable', 'clasificacion_biologico'
-    )
+    @api.depends('cretib_mask')
     def _compute_clasificaciones_cretib(self):
         for record in self:
-            tags = []
-            if record.clasificacion_corrosivo: tags.append('C')
-            if record.clasificacion_reactivo: tags.append('R')
-            if record.clasificacion_explosivo: tags.append('E')
-            if record.clasificacion_toxico: tags.append('T')
-            if record.clasificacion_inflamable: tags.append('I')
-            if record.clasificacion_biologico: tags.append('B')
-            record.clasificaciones_cretib = ', '.join(tags)
+            record.clasificaciones_cretib = _cretib_letters(record.cretib_mask)
 
     def _load_from_product(self):
-        prod = self.producto_id
-        if not prod:
+        if not self.producto_id:
             return
-        if not self.nombre_residuo:
-            self.nombre_residuo = prod.name
-        for f in ('clasificacion_corrosivo', 'clasificacion_reactivo',
-                  'clasificacion_explosivo', 'clasificacion_toxico',
-                  'clasificacion_inflamable', 'clasificacion_biologico'):
-            if hasattr(prod, f) and getattr(prod, f):
-                setattr(self, f, True)
-        if hasattr(prod, 'envase_tipo_default') and prod.envase_tipo_default:
-            self.envase_tipo = prod.envase_tipo_default
-        if hasattr(prod, 'envase_capacidad_default') and prod.envase_capacidad_default:
-            self.envase_capacidad = str(prod.envase_capacidad_default)
+        loaded = self.env['salida.acopio.linea']._get_product_data(self.producto_id)[self.producto_id.id]
+        self.update(_merge_loaded_vals({f: self[f] for f in loaded}, loaded))
 
     def _load_from_lot(self):
-        lot = self.lote_id
-        if not lot:
+        if not self.lote_id:
             return
-        cretib_fields = [
-            'clasificacion_corrosivo', 'clasificacion_reactivo',
-            'clasificacion_explosivo', 'clasificacion_toxico',
-            'clasificacion_inflamable', 'clasificacion_biologico',
-        ]
-        for f in cretib_fields:
-            if f in lot._fields and getattr(lot, f):
-                setattr(self, f, True)
-        if 'tipo_manejo_id' in lot._fields and lot.tipo_manejo_id:
-            self.tipo_manejo_id = lot.tipo_manejo_id.id
-
-        residuo = self.env['manifiesto.ambiental.residuo'].search([
-            ('lot_id', '=', lot.id),
-            ('manifiesto_id.tipo_manifiesto', '=', 'entrada'),
-            ('manifiesto_id.is_current_version', '=', True),
-        ], limit=1, order='id desc')
-        if residuo:
-            if not self.nombre_residuo:
-                self.nombre_residuo = residuo.nombre_residuo
-            self.residue_type = residuo.residue_type or False
-            self.envase_tipo = residuo.envase_tipo or False
-            self.envase_cantidad = residuo.envase_cantidad or 1
-            self.envase_capacidad = residuo.envase_capacidad or ''
-            self.packaging_id = residuo.packaging_id.id if residuo.packaging_id else False
-            for f in cretib_fields:
-                if not getattr(self, f) and getattr(residuo, f, False):
-                    setattr(self, f, True)
+        loaded = self.env['salida.acopio.linea']._get_lot_data(self.lote_id)[self.lote_id.id]
+        self.update(_merge_loaded_vals({f: self[f] for f in loaded}, loaded))
 
     @api.onchange('producto_id')
     def _onchange_producto_id(self):
@@ -447,14 +507,12 @@ class SalidaAcopioWizardLinea(models.TransientModel):
                     }
                 }
 
-        otras = self.env['salida.acopio.linea'].search([
-            ('lote_id', '=', self.lote_id.id),
-            ('salida_id.state', 'in', ('draft', 'done')),
-        ], limit=1)
+        otras = self.env['salida.acopio.linea']._get_salidas_by_lot(self.lote_id.ids).get(self.lote_id.id)
         if otras:
-            estado = 'ya entregado en' if otras.salida_id.state == 'done' else 'reservado en borrador en'
+            otra = otras[:1]
+            estado = LOT_CONFLICT_ESTADOS.get(otra.state, 'reservado en borrador en')
             lote_name = self.lote_id.name
-            ref = otras.salida_id.numero_referencia
+            ref = otra.numero_referencia
             self.lote_id = False
             self.cantidad = 0.0
             return {
@@ -466,15 +524,9 @@ class SalidaAcopioWizardLinea(models.TransientModel):
                 }
             }
 
-        location_acopio = self._get_location_acopio()
-        if location_acopio:
-            quants = self.env['stock.quant'].search([
-                ('product_id', '=', self.producto_id.id),
-                ('location_id', '=', location_acopio.id),
-                ('lot_id', '=', self.lote_id.id),
-                ('quantity', '>', 0),
-            ])
-            disponible = sum(quants.mapped('quantity'))
+        snapshot = self._get_acopio_quant_snapshot()
+        if snapshot:
+            disponible = snapshot['by_lot'].get((self.producto_id.id, self.lote_id.id), 0.0)
             if disponible > 0 and self.cantidad == 0.0:
                 self.cantidad = disponible
         self._load_from_lot()
@@ -520,13 +572,12 @@ class SalidaAcopioWizardLinea(models.TransientModel):
 
     @api.constrains('lote_id', 'wizard_id')
     def _check_lote_unico_en_wizard(self):
-        for record in self:
-            if not record.lote_id or not record.wizard_id:
-                continue
-            duplicados = record.wizard_id.linea_ids.filtered(
-                lambda l: l != record and l.lote_id and l.lote_id.id == record.lote_id.id
-            )
-            if duplicados:
+        for wizard in self.wizard_id:
+            lotes_vistos = set()
+            for linea in wizard.linea_ids.filtered('lote_id'):
+                if linea.lote_id.id not in lotes_vistos:
+                    lotes_vistos.add(linea.lote_id.id)
+                    continue
                 raise ValidationError(
-                    f"⚠️ El lote '{record.lote_id.name}' ya está incluido en otra línea."
+                    f"⚠️ El lote '{linea.lote_id.name}' ya está incluido en otra línea."
                 )
\ No newline at end of file